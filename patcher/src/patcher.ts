@@ -29,3 +29,93 @@ export function applyDiff(romBuffer: ArrayBuffer, diff: DiffItem[]): Uint8Array
 
   return out
 }
+
+/** 二进制补丁（格式见 python/binpatch.py）或 diff.json 转换后的一条记录：在 pos 处写入 bytes */
+export interface PatchRecord {
+  pos: number
+  bytes: Uint8Array
+}
+
+/** 二进制补丁文件头："NRPB" + version + flags */
+const BIN_MAGIC = [0x4e, 0x52, 0x50, 0x42]
+const BIN_VERSION = 1
+const FLAG_ZLIB = 0x01
+
+/** 按文件头 magic 判断是否为二进制补丁（用于区分 diff.bin 与开发服务器回退的 index.html 等） */
+export function isBinaryPatch(buffer: ArrayBuffer): boolean {
+  const head = new Uint8Array(buffer, 0, Math.min(buffer.byteLength, BIN_MAGIC.length))
+  return head.length === BIN_MAGIC.length && BIN_MAGIC.every((b, i) => head[i] === b)
+}
+
+async function inflate(data: Uint8Array): Promise<Uint8Array> {
+  const stream = new Blob([data]).stream().pipeThrough(new DecompressionStream('deflate'))
+  return new Uint8Array(await new Response(stream).arrayBuffer())
+}
+
+/**
+ * 解码二进制补丁：varint 记录数，随后每条为 varint gap（相对上一条结束位置）、varint length、length 字节数据。
+ * flags bit0 为 1 时 body 经 zlib 压缩，用浏览器自带的 DecompressionStream 解压。
+ * @param buffer diff.bin 的 ArrayBuffer
+ * @returns 按 pos 升序的记录，bytes 为 body 上的零拷贝视图
+ */
+export async function decodeBinaryPatch(buffer: ArrayBuffer): Promise<PatchRecord[]> {
+  if (!isBinaryPatch(buffer) || buffer.byteLength < BIN_MAGIC.length + 2) {
+    throw new Error('二进制补丁格式错误：magic 不符')
+  }
+  const header = new Uint8Array(buffer, BIN_MAGIC.length, 2)
+  const version = header[0]!
+  const flags = header[1]!
+  if (version !== BIN_VERSION) throw new Error(`不支持的二进制补丁版本: ${version}`)
+  let body: Uint8Array = new Uint8Array(buffer, BIN_MAGIC.length + 2)
+  if (flags & FLAG_ZLIB) body = await inflate(body)
+
+  let p = 0
+  const readVarint = (): number => {
+    let value = 0
+    let scale = 1
+    for (;;) {
+      if (p >= body.length) throw new Error('二进制补丁被截断（varint 未结束）')
+      const b = body[p++]!
+      value += (b & 0x7f) * scale
+      if (b < 0x80) return value
+      scale *= 0x80
+    }
+  }
+
+  const count = readVarint()
+  const records: PatchRecord[] = []
+  let end = 0
+  for (let i = 0; i < count; i++) {
+    const pos = end + readVarint()
+    const length = readVarint()
+    if (p + length > body.length) throw new Error('二进制补丁被截断（记录数据不完整）')
+    records.push({ pos, bytes: body.subarray(p, p + length) })
+    p += length
+    end = pos + length
+  }
+  return records
+}
+
+/** 把 diff.json 数组转成与二进制补丁相同的记录形式 */
+export function diffToRecords(diff: DiffItem[]): PatchRecord[] {
+  return diff.map(item => ({ pos: parseInt(item.pos, 16), bytes: Uint8Array.from(item.bytes, b => b & 0xff) }))
+}
+
+/**
+ * 按记录给 ROM 打补丁，每条记录一次整段拷贝；结果与 applyDiff 相同。
+ * @param romBuffer 原版 ROM 的 ArrayBuffer
+ * @param records decodeBinaryPatch / diffToRecords 的结果
+ * @returns 打补丁后的 ROM
+ */
+export function applyRecords(romBuffer: ArrayBuffer, records: PatchRecord[]): Uint8Array {
+  const out = new Uint8Array(new Uint8Array(romBuffer))
+  for (const { pos, bytes } of records) {
+    if (pos < 0 || pos + bytes.length > out.length) {
+      throw new Error(
+        `补丁越界: pos=0x${pos.toString(16)}, len=${bytes.length}, romLen=${out.length}`,
+      )
+    }
+    out.set(bytes, pos)
+  }
+  return out
+}
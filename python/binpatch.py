@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+二进制补丁格式（.bin），与 diff.json 等价但体积小得多，网页 Patcher（patcher/src/patcher.ts）与
+patch.py 的 apply_prepatch 都能直接读取。
+
+格式（多字节定长字段为小端序，varint 为无符号 LEB128）：
+    magic   4 字节 b"NRPB"
+    version u8，当前为 1
+    flags   u8，bit0 = 1 表示 body 经 zlib（deflate）压缩
+    body    varint 记录数 N，随后 N 条记录：
+              varint gap     本条 offset 减去上一条结束位置（第一条相对 0）
+              varint length  字节数
+              length 字节    原样写入的数据
+记录按 offset 升序且互不重叠，因此 gap 总是非负的小数。
+
+Example:
+    data = encode_patch([(0x6DA84, b"\x81\x40"), (0x6DA90, b"\x00")])
+    assert decode_patch(data) == [(0x6DA84, b"\x81\x40"), (0x6DA90, b"\x00")]
+"""
+
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Iterable
+
+MAGIC = b"NRPB"
+VERSION = 1
+FLAG_ZLIB = 0x01
+
+
+def is_binary_patch(data: bytes) -> bool:
+    return data[: len(MAGIC)] == MAGIC
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    _put_varint(out, value)
+    return bytes(out)
+
+
+def _get_varint(data: bytes | memoryview, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("二进制补丁被截断（varint 未结束）")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_patch(records: Iterable[tuple[int, bytes]], compress: bool = True) -> bytes:
+    """把 [(offset, data), ...]（按 offset 升序、互不重叠）编码为二进制补丁。"""
+    body = bytearray()
+    entries = [(offset, data) for offset, data in records if len(data)]
+    _put_varint(body, len(entries))
+    end = 0
+    for offset, data in entries:
+        if offset < end:
+            raise ValueError(f"补丁记录未按 offset 升序或有重叠: 0x{offset:X} < 0x{end:X}")
+        _put_varint(body, offset - end)
+        _put_varint(body, len(data))
+        body += data
+        end = offset + len(data)
+    flags = 0
+    if compress:
+        body = bytearray(zlib.compress(bytes(body), 9))
+        flags |= FLAG_ZLIB
+    return MAGIC + bytes([VERSION, flags]) + bytes(body)
+
+
+def decode_patch(data: bytes) -> list[tuple[int, bytes]]:
+    """解码二进制补丁为 [(offset, data), ...]；格式不符时抛 ValueError。"""
+    if not is_binary_patch(data) or len(data) < len(MAGIC) + 2:
+        raise ValueError("不是二进制补丁（magic 不符）")
+    version, flags = data[len(MAGIC)], data[len(MAGIC) + 1]
+    if version != VERSION:
+        raise ValueError(f"不支持的二进制补丁版本: {version}")
+    body = data[len(MAGIC) + 2 :]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+    view = memoryview(body)
+    count, pos = _get_varint(view, 0)
+    records = []
+    end = 0
+    for _ in range(count):
+        gap, pos = _get_varint(view, pos)
+        length, pos = _get_varint(view, pos)
+        if pos + length > len(view):
+            raise ValueError("二进制补丁被截断（记录数据不完整）")
+        offset = end + gap
+        records.append((offset, bytes(view[pos : pos + length])))
+        pos += length
+        end = offset + length
+    return records
+
+
+class PatchWriter:
+    """
+    流式写二进制补丁：记录先追加到临时文件并计数，close() 时再写文件头、记录数与记录（可边读边压缩），
+    内存占用与补丁大小无关。记录须按 offset 升序、互不重叠地 add()。
+    """
+
+    def __init__(self, path: str | Path, compress: bool = True):
+        self.path = Path(path)
+        self.compress = compress
+        self.count = 0
+        self._end = 0
+        self._body = tempfile.TemporaryFile()
+
+    def __enter__(self) -> "PatchWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._body.close()
+
+    def add(self, offset: int, data: bytes | memoryview) -> None:
+        if not len(data):
+            return
+        if offset < self._end:
+            raise ValueError(f"补丁记录未按 offset 升序或有重叠: 0x{offset:X} < 0x{self._end:X}")
+        self._body.write(_varint(offset - self._end) + _varint(len(data)))
+        self._body.write(data)
+        self._end = offset + len(data)
+        self.count += 1
+
+    def close(self) -> int:
+        """写出补丁文件，返回文件字节数。"""
+        flags = FLAG_ZLIB if self.compress else 0
+        compressor = zlib.compressobj(9) if self.compress else None
+        with open(self.path, "wb") as out:
+            out.write(MAGIC + bytes([VERSION, flags]))
+
+            def emit(chunk: bytes) -> None:
+                out.write(compressor.compress(chunk) if compressor else chunk)
+
+            emit(_varint(self.count))
+            self._body.seek(0)
+            for chunk in iter(lambda: self._body.read(1 << 20), b""):
+                emit(chunk)
+            if compressor:
+                out.write(compressor.flush())
+            size = out.tell()
+        self._body.close()
+        return size
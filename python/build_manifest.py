@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+构建清单：记录上一次 patch.py 构建输出 ROM 时的输入指纹（原版 ROM、prepatch、字模参数、字符顺序）
+以及每个 offset 写入的译文字节摘要，供 --incremental 增量重建判断哪些内容需要重写。
+
+Example:
+    previous = BuildManifest.load("patched.gba.manifest.json")
+    reason = previous.full_rebuild_reason(current, "patched.gba") if previous else "没有构建清单"
+    if reason is None:
+        start = previous.reusable_glyphs(current)
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+from glyph_cache import file_sha256
+
+# 清单格式或构建流程有不兼容改动时递增，旧清单自然失效
+MANIFEST_VERSION = 1
+
+
+def manifest_path_for(out_rom: str | Path) -> Path:
+    """输出 ROM 对应的默认清单路径：<out_rom>.manifest.json。"""
+    out_rom = Path(out_rom)
+    return out_rom.with_name(out_rom.name + ".manifest.json")
+
+
+def entry_digest(encoded: bytes) -> str:
+    """单条译文编码后字节的摘要（只用于比对是否变化）。"""
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+class BuildManifest:
+    """
+    一次构建的指纹：
+    - base_rom / prepatch: 原版 ROM 与 prepatch 文件的 sha256（prepatch 不存在时为空串）；
+    - glyphs: 字模命名空间 {"8x8": ..., "8x16": ...}（字体内容 + 渲染参数）；
+    - chars: 按槽位顺序排列的字符，下标即 mapping_key / 字模槽位的偏移；
+    - entries: {offset: [长度, 摘要]}，每个 offset 上次写入的译文字节；
+    - output: 构建完成后输出 ROM 的 sha256，用于发现构建之外的改动。
+    """
+
+    def __init__(
+        self,
+        base_rom: str,
+        prepatch: str,
+        glyphs: dict[str, str],
+        chars: list[str],
+        entries: dict[int, tuple[int, str]] | None = None,
+        output: str = "",
+    ):
+        self.base_rom = base_rom
+        self.prepatch = prepatch
+        self.glyphs = glyphs
+        self.chars = chars
+        self.entries = entries if entries is not None else {}
+        self.output = output
+
+    @classmethod
+    def load(cls, path: str | Path) -> "BuildManifest | None":
+        """读取清单；文件不存在、损坏或版本不符时返回 None（即需要全量构建）。"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            if raw.get("version") != MANIFEST_VERSION:
+                return None
+            return cls(
+                base_rom=raw["base_rom"],
+                prepatch=raw["prepatch"],
+                glyphs=raw["glyphs"],
+                chars=raw["chars"],
+                entries={int(off, 16): (size, digest) for off, (size, digest) in raw["entries"].items()},
+                output=raw["output"],
+            )
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path: str | Path) -> None:
+        raw = {
+            "version": MANIFEST_VERSION,
+            "base_rom": self.base_rom,
+            "prepatch": self.prepatch,
+            "glyphs": self.glyphs,
+            "chars": self.chars,
+            "entries": {f"0x{off:X}": [size, digest] for off, (size, digest) in sorted(self.entries.items())},
+            "output": self.output,
+        }
+        tmp = Path(str(path) + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(raw, f, ensure_ascii=False)
+        tmp.replace(path)
+
+    def full_rebuild_reason(self, current: "BuildManifest", out_rom: str | Path) -> str | None:
+        """
+        判断能否在上次的输出 ROM 上增量重建，不能时返回原因，能则返回 None。
+        字符只在末尾追加时已有字符的 mapping_key 与槽位不变；顺序一旦移位，所有编码都会变，只能全量重建。
+        """
+        out_rom = Path(out_rom)
+        if not out_rom.exists():
+            return "输出 ROM 不存在"
+        if self.base_rom != current.base_rom:
+            return "原版 ROM 已变化"
+        if self.prepatch != current.prepatch:
+            return "prepatch 已变化"
+        if current.chars[: len(self.chars)] != self.chars:
+            return "字符顺序变化，mapping key 会移位"
+        if file_sha256(out_rom) != self.output:
+            return "输出 ROM 在上次构建后被改动"
+        return None
+
+    def reusable_glyphs(self, current: "BuildManifest") -> int:
+        """ROM 中可以保留的字模槽位数：字模参数未变时为上次的字符数，否则全部重新注入。"""
+        return len(self.chars) if self.glyphs == current.glyphs else 0
@@ -1,120 +1,25 @@
 # fashion16_to_gba8x16.py
 # pip install freetype-py pillow
-import freetype
-from PIL import Image
-
-INK, BG = 3, 0x11
-
-def ft_render_mono(face, ch, px_size=16, cell_size=None):
-    """
-    cell_size: 可选 (width, height)，如 (8, 12) 表示指定 8×12 格；不传则仅用 px_size 作为高度、宽度由字体比例决定。
-    """
-    if cell_size is not None:
-        cw, ch_h = cell_size
-        face.set_pixel_sizes(cw, ch_h)
-    else:
-        face.set_pixel_sizes(0, px_size)
-    face.load_char(ch, freetype.FT_LOAD_RENDER | freetype.FT_LOAD_TARGET_MONO)
-    bmp = face.glyph.bitmap
-    w, h = bmp.width, bmp.rows
-    buf = bmp.buffer
-    pitch = bmp.pitch
-
-    px = [[0]*w for _ in range(h)]
-    for y in range(h):
-        row = buf[y*pitch:(y+1)*pitch]
-        for x in range(w):
-            byte = row[x >> 3]
-            bit = (byte >> (7 - (x & 7))) & 1
-            px[y][x] = bit
-    return px, w, h
-
-def blit_center(src, sw, sh, dw, dh, xoff=0, yoff=0):
-    dst = [[0]*dw for _ in range(dh)]
-    ox = (dw - sw)//2 + xoff
-    oy = (dh - sh)//2 + yoff
-    for y in range(sh):
-        ty = oy + y
-        if 0 <= ty < dh:
-            row = src[y]
-            for x in range(sw):
-                tx = ox + x
-                if 0 <= tx < dw:
-                    dst[ty][tx] = row[x]
-    return dst
-
-def compress_16w_to_8w(src16x16, mode="or"):
-    """
-    把 16x16 压成 8x16：每 2 列合并成 1 列
-    mode:
-      - "or"  : 2列任意有墨就算有（推荐，细线更不容易丢）
-      - "and" : 2列都要有才算有（更细但容易断）
-      - "major": 2列>=1 算有（等价 or，留个口子以后扩）
-    """
-    return compress_16w_to_8w_h(src16x16, height=16, mode=mode)
-
-
-def compress_16w_to_8w_h(src_16wide, height, mode="or"):
-    """把 16×height 压成 8×height：每 2 列合并成 1 列。"""
-    out = [[0] * 8 for _ in range(height)]
-    for y in range(height):
-        for x in range(8):
-            a = src_16wide[y][2 * x]
-            b = src_16wide[y][2 * x + 1]
-            if mode == "and":
-                out[y][x] = 1 if (a and b) else 0
-            else:
-                out[y][x] = 1 if (a or b) else 0
-    return out
+# 字模逻辑在 python/font_render/font_8x16.py，这里只保留单独出 bin / 预览图的调试入口
+import sys
+from pathlib import Path
 
+import freetype
 
-def scale_8x12_to_8x16(grid_8x12):
-    """将 8×12 点阵最近邻缩放到 8×16。"""
-    out = [[0] * 8 for _ in range(16)]
-    for y in range(16):
-        sy = int(y * 12 / 16)
-        if sy >= 12:
-            sy = 11
-        out[y] = grid_8x12[sy][:]
-    return out
-
-
-def pad_8x12_to_8x16(grid_8x12):
-    """将 8×12 点阵垂直居中填充到 8×16（上下各 2 行空白）。"""
-    out = [[0] * 8 for _ in range(16)]
-    for y in range(12):
-        out[y + 2][:] = grid_8x12[y]
-    return out
-
-def tile01_to_gba4bpp(tile01_8x8, ink=3, bg=BG):
-    ink &= 0xF
-    bg &= 0xF
-    out = bytearray()
-    for y in range(8):
-        for x in range(0, 8, 2):
-            p0 = ink if tile01_8x8[y][x] else bg
-            p1 = ink if tile01_8x8[y][x+1] else bg
-            out.append(((p1 & 0xF) << 4) | (p0 & 0xF))
-    return bytes(out)
-
-def glyph8x16_to_gba4bpp(g8x16, ink=3, bg=BG):
-    top = [row[:] for row in g8x16[:8]]
-    bot = [row[:] for row in g8x16[8:]]
-    return tile01_to_gba4bpp(top, ink, bg) + tile01_to_gba4bpp(bot, ink, bg)
-
-def make_preview_8x16(glyphs01, cols=32, scale=8):
-    rows = (len(glyphs01) + cols - 1)//cols
-    img = Image.new("L", (cols*8, rows*16), 0)
-    for i, g in enumerate(glyphs01):
-        tx, ty = (i % cols)*8, (i//cols)*16
-        for y in range(16):
-            for x in range(8):
-                if g[y][x]:
-                    img.putpixel((tx+x, ty+y), 255)
-    return img.resize((img.width*scale, img.height*scale), Image.NEAREST)
-
-def hex_dump(data: bytes):
-    return " ".join(f"{b:02X}" for b in data)
+PYTHON_DIR = Path(__file__).resolve().parent.parent
+if str(PYTHON_DIR) not in sys.path:
+    sys.path.insert(0, str(PYTHON_DIR))
+
+from font_render.font_8x16 import (  # noqa: E402
+    BG,
+    INK,
+    blit_center,
+    compress_16w_to_8w,
+    ft_render_mono,
+    glyph8x16_to_gba4bpp,
+    hex_dump,
+    make_preview_8x16,
+)
 
 def main():
     # 改成你下载的 FashionBitmap16 字体文件名
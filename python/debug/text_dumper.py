@@ -1,7 +1,20 @@
+import hashlib
 import json
 import os
 import math
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+PYTHON_DIR = Path(__file__).resolve().parent.parent
+if str(PYTHON_DIR) not in sys.path:
+    sys.path.insert(0, str(PYTHON_DIR))
+
+from rom_image import RomImage
 # --- 扩展配置 ---
 ROM_PATH = "hexproj/original.gba"
 OUTPUT_DIR = "python/debug/text_dump"
@@ -10,121 +23,306 @@ MIN_TEXT_LEN = 4
 CLUSTER_THRESHOLD = 0x200
 START_OFFSET = 0x6DA84
 MEANINGFUL_CHAR_PATTERN = re.compile(r'[ぁ-んァ-ヶ\u4E00-\u9FAF\uFF66-\uFF9F]')
-# 假设你的码表是一个简单的文本文件或字典
-# 如果你的码表是二进制的，需要根据你的 [u16key][u16val] 结构解析
-def load_binary_charset(bin_path):
+# 码表为二进制 [u16 key][u16 value] 结构，key 为小端存储的 SJIS 码
+def load_charset_bitmap(bin_path):
     """
-    解析二进制码表 [u16 key][u16 value]
-    并返回一个包含所有合法字符的 set
+    解析二进制码表 [u16 key][u16 value]，返回 65536 项的 np.bool_ 位图，按大端 SJIS 码索引，命中即为码表内字符。
+    位图缓存在码表旁的 <bin_path>.lut（头部为码表文件的 sha256），码表不变时直接读取缓存。
+    码表 key 均为双字节，半角字符不会出现在位图中；无法按 Shift-JIS 解码的 key 不计入。
     """
     if not os.path.exists(bin_path):
         print(f"警告: 找不到码表文件 {bin_path}，将跳过码表过滤。")
         return None
-    
-    valid_chars = set()
+
     with open(bin_path, 'rb') as f:
         data = f.read()
-    
-    # 每个条目 4 字节 (u16 + u16)
+    digest = hashlib.sha256(data).digest()
+
+    cache_path = bin_path + ".lut"
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            cached = f.read()
+        if cached[:len(digest)] == digest and len(cached) == len(digest) + 0x10000:
+            print(f"码表位图命中缓存 {cache_path}")
+            return np.frombuffer(cached, dtype=np.bool_, offset=len(digest)).copy()
+
+    # key 为小端 u16：低字节在前，数值本身就是大端 SJIS 码
     entry_count = len(data) // 4
-    print(f"正在加载码表，共 {entry_count} 个条目...")
-
-    for i in range(entry_count):
-        # 读取前两个字节作为 key (小端序)
-        low_byte = data[i*4]
-        high_byte = data[i*4 + 1]
-        sjis_bytes = bytes([high_byte, low_byte])
-        # 尝试将 key 转换为字符
-        # 这种方式兼容你的查码表函数逻辑
-        try:
-            # GBA 是小端序，但 Shift-JIS 双字节在码表中通常按大端序存储
-            # 如果你的 key 存储是小端序，这里用 'little'，否则用 'big'
-            # 大多数 GBA 码表 key 会保持 SJIS 原始顺序 (Big-endian)
-            char = sjis_bytes.decode('shift-jis')
-            valid_chars.add(char)
-        except UnicodeDecodeError:
-            # 如果无法解码，说明可能不是标准的 SJIS 字符，或者存储序有误
-            # 也可以尝试直接存 hex 字符串进行比对
-            pass
-
-    print(f"码表加载完成，有效字符去重后共: {len(valid_chars)} 个")
-    return valid_chars
+    keys = np.frombuffer(data, dtype='<u2', count=entry_count * 2)[::2]
+    bitmap = np.zeros(0x10000, dtype=np.bool_)
+    bitmap[keys] = True
+    # 只保留能解码为字符的 key
+    bitmap &= _base_luts()[0] > 0
+    print(f"码表位图构建完成，共 {entry_count} 个条目，有效字符 {int(bitmap.sum())} 个")
+
+    with open(cache_path, 'wb') as f:
+        f.write(digest)
+        f.write(bitmap.tobytes())
+    return bitmap
 
 def is_sjis_first_byte(b):
     return (0x81 <= b <= 0x9F) or (0xE0 <= b <= 0xEF)
 
-def dump_all_sjis(rom_path, charset=None):
-    if not os.path.exists(rom_path):
+# --- 向量化扫描引擎 ---
+# 扫描语义与逐字节版本一致：从 START_OFFSET 起，每个片段尽量向后吃字
+# （双字节 SJIS / 半角），遇到不合法字节 e 即断开，下一片段从 e + 1 开始。
+# 这里先用查找表把每个字节一次性分类成“步长”（2=双字节字、1=半角字、0=断开），
+# 再把整条扫描链在“硬断点”处切成互不依赖的段，所有段同步向前步进，
+# 最后只解码通过过滤的片段。
+SJIS_LEAD_BYTES = [*range(0x81, 0xA0), *range(0xE0, 0xF0)]
+SJIS_HALF_BYTES = [*range(0x20, 0x7F), *range(0xA1, 0xE0)]
+# 同步步进的段数少于此值时改为逐段 Python 循环，避免每步的 NumPy 调用开销
+MIN_VECTOR_WALKERS = 64
+# 多进程分片时向前/向后查找断开字节的窗口大小
+SHARD_SEARCH_WINDOW = 0x10000
+
+
+def _decode_or_none(raw):
+    try:
+        return raw.decode('shift-jis')
+    except UnicodeDecodeError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _base_luts():
+    """不带码表的查找表（只看能否解码），只构建一次。"""
+    double_step = np.zeros(0x10000, dtype=np.int8)
+    double_meaningful = np.zeros(0x10000, dtype=np.int8)
+    for hi in SJIS_LEAD_BYTES:
+        for lo in range(0x40, 0xFD):
+            char = _decode_or_none(bytes([hi, lo]))
+            if char is None:
+                continue
+            code = (hi << 8) | lo
+            double_step[code] = 2
+            double_meaningful[code] = bool(MEANINGFUL_CHAR_PATTERN.match(char))
+
+    single_step = np.zeros(0x100, dtype=np.int8)
+    single_meaningful = np.zeros(0x100, dtype=np.int8)
+    for b in SJIS_HALF_BYTES:
+        char = _decode_or_none(bytes([b]))
+        if char is None:
+            continue
+        single_step[b] = 1
+        single_meaningful[b] = bool(MEANINGFUL_CHAR_PATTERN.match(char))
+    return double_step, single_step, double_meaningful, single_meaningful
+
+
+def build_sjis_luts(charset=None):
+    """
+    构建扫描用查找表，返回 (double_step, single_step, double_meaningful, single_meaningful)：
+    - double_step: 65536 项，按大端 SJIS 码索引；可解码且（若给了码表）在码表内为 2，否则 0
+    - single_step: 256 项，半角区域为 1；0xA1-0xDF 同样受码表约束
+    - *_meaningful: 对应字符是否命中 MEANINGFUL_CHAR_PATTERN（0/1）
+    charset 为 load_charset_bitmap 返回的位图，None 表示不过滤。
+    """
+    double_step, single_step, double_meaningful, single_meaningful = _base_luts()
+    if charset is None:
+        return double_step, single_step, double_meaningful, single_meaningful
+    single_charset = charset[:0x100].copy()
+    single_charset[:0x80] = True
+    return (
+        np.where(charset, double_step, 0).astype(np.int8),
+        np.where(single_charset, single_step, 0).astype(np.int8),
+        np.where(charset, double_meaningful, 0).astype(np.int8),
+        np.where(single_charset, single_meaningful, 0).astype(np.int8),
+    )
+
+
+def _classify(data, luts):
+    """对每个字节求步长与“有意义字符”标记，末尾附两个哨兵位置（步长 0）。"""
+    double_step, single_step, double_meaningful, single_meaningful = luts
+    n = len(data)
+    step = np.zeros(n + 2, dtype=np.int8)
+    meaningful = np.zeros(n + 2, dtype=np.int8)
+    step[:n] = single_step[data]
+    meaningful[:n] = single_meaningful[data]
+    if n > 1:
+        code = (data[:-1].astype(np.uint16) << 8) | data[1:]
+        # 首字节与半角区域不相交，按位或即可合并两种判定
+        step[:n - 1] |= double_step[code]
+        meaningful[:n - 1] |= double_meaningful[code]
+    return step, meaningful
+
+
+def _walk_tail(step, meaningful, start, pos, count, limit, out):
+    """剩余少量段的逐段步进，语义与 scan_sjis_runs 中的同步步进相同。"""
+    step = step.tobytes()
+    meaningful = meaningful.tobytes()
+    for s, p, c, hi in zip(start.tolist(), pos.tolist(), count.tolist(), limit.tolist()):
+        while True:
+            st = step[p]
+            if st:
+                c += meaningful[p]
+                p += st
+                continue
+            out.append((s, p, c))
+            p += 1
+            while p < hi and not step[p]:
+                p += 1
+            if p >= hi:
+                break
+            s, c = p, 0
+
+
+def scan_sjis_runs(data, luts, base=0):
+    """
+    扫描 data（np.uint8 数组）。data[0] 必须是扫描链上的片段起点，
+    如 START_OFFSET，或某个“硬断点”之后的位置。
+    返回通过长度与有意义字符过滤的片段 [(offset, end), ...]，已加上 base，按 offset 升序。
+    """
+    n = len(data)
+    step, meaningful = _classify(data, luts)
+
+    # next_start[p]: p 及之后第一个能成字的位置（没有则为 n）
+    next_start = np.where(step > 0, np.arange(n + 2), n)
+    next_start = np.minimum.accumulate(next_start[::-1])[::-1]
+
+    # 既不能成字、又不能作为双字节尾字节的“硬断点”：任何片段都无法跨过它，
+    # 因此它之后的位置一定在扫描链上，可据此把链切成互不依赖的段。
+    trail_ok = luts[0].reshape(0x100, 0x100).any(axis=0)
+    hard = np.flatnonzero((step[:n] == 0) & ~trail_ok[data])
+    limit = np.append(hard, n)
+    start = next_start[np.append(0, hard + 1)]
+    alive = start < limit
+    start, limit = start[alive], limit[alive]
+    pos = start.copy()
+    count = np.zeros(start.size, dtype=np.int64)
+
+    # 所有段同步步进：每轮每段前进一个字；片段断开时记录并跳到下一个能成字的位置
+    found = []
+    while pos.size >= MIN_VECTOR_WALKERS:
+        st = step[pos]
+        count += meaningful[pos]
+        pos += st
+        ended = np.flatnonzero(st == 0)
+        if not ended.size:
+            continue
+        found.append((start[ended], pos[ended], count[ended]))
+        restart = next_start[pos[ended] + 1]
+        start[ended] = restart
+        pos[ended] = restart
+        count[ended] = 0
+        dead = ended[restart >= limit[ended]]
+        if dead.size:
+            alive = np.ones(pos.size, dtype=bool)
+            alive[dead] = False
+            start, pos, count, limit = start[alive], pos[alive], count[alive], limit[alive]
+
+    tail = []
+    _walk_tail(step, meaningful, start, pos, count, limit, tail)
+    if tail:
+        found.append(tuple(np.array(col, dtype=np.int64) for col in zip(*tail)))
+    if not found:
         return []
-    
-    with open(rom_path, 'rb') as f:
-        rom_data = f.read()
 
+    starts, ends, counts = (np.concatenate(col) for col in zip(*found))
+    keep = (ends - starts >= MIN_TEXT_LEN) & (counts >= 2)
+    starts, ends = starts[keep], ends[keep]
+    order = np.argsort(starts, kind='stable')
+    starts = (starts[order] + base).tolist()
+    ends = (ends[order] + base).tolist()
+    return list(zip(starts, ends))
+
+
+def _dump_range(rom_data, scan_lo, scan_hi, own_lo, own_hi, luts):
+    """
+    扫描 rom_data[scan_lo:scan_hi]，只保留起点落在 [own_lo, own_hi) 内的片段并解码。
+    scan_lo 必须在扫描链上（START_OFFSET 或断开字节之后），scan_hi 为断开字节或 ROM 末尾。
+    """
+    data = np.frombuffer(rom_data, dtype=np.uint8, count=scan_hi - scan_lo, offset=scan_lo)
     raw_results = []
-    # 直接从你的上边界开始，无视前面的代码区
-    offset = START_OFFSET 
+    for start, end in scan_sjis_runs(data, luts, base=scan_lo):
+        if start < own_lo or start >= own_hi:
+            continue
+        raw = bytes(rom_data[start:end])
+        raw_results.append({
+            "offset": start,
+            "length": len(raw),
+            "hex": raw.hex().upper(),
+            "original": raw.decode('shift-jis'),
+            "translation": ""
+        })
+    del data
+    return raw_results
+
+
+def _dump_shard(rom_path, scan_lo, scan_hi, own_lo, own_hi, charset):
+    """子进程入口：各自只读映射同一个 ROM 文件（RomImage），页缓存由系统共享。"""
+    with RomImage(rom_path) as rom:
+        return _dump_range(rom.buffer, scan_lo, scan_hi, own_lo, own_hi, build_sjis_luts(charset))
+
+
+def _break_bytes(luts):
+    """既不能成字、不能作首字节、也不能作尾字节的字节值：任何片段都在这里断开。"""
+    double_step, single_step = luts[0], luts[1]
+    lead = np.zeros(0x100, dtype=bool)
+    lead[SJIS_LEAD_BYTES] = True
+    trail_ok = double_step.reshape(0x100, 0x100).any(axis=0)
+    return (single_step == 0) & ~lead & ~trail_ok
+
+
+def _find_break(rom_data, pos, lo, hi, breaks, backward):
+    """在 [lo, hi) 内从 pos 向前（backward）或向后查找最近的断开字节，找不到返回 None。"""
+    window = SHARD_SEARCH_WINDOW
+    while True:
+        if backward:
+            a, b = max(lo, pos - window), pos
+        else:
+            a, b = pos, min(hi, pos + window)
+        if a >= b:
+            return None
+        hits = np.flatnonzero(breaks[np.frombuffer(rom_data, dtype=np.uint8, count=b - a, offset=a)])
+        if hits.size:
+            return a + int(hits[-1] if backward else hits[0])
+        pos = a if backward else b
+
+
+def plan_shards(rom_data, start, workers, luts):
+    """
+    把 [start, len) 均分为 workers 份，返回 [(scan_lo, scan_hi, own_lo, own_hi), ...]。
+    每份的扫描区间向前扩到上一个断开字节之后、向后扩到下一个断开字节，
+    因此相邻分片有重叠，但每个片段只归属起点所在的那一份。
+    """
     rom_len = len(rom_data)
+    breaks = _break_bytes(luts)
+    size = max(1, -(-(rom_len - start) // workers))
+    shards = []
+    for own_lo in range(start, rom_len, size):
+        own_hi = min(own_lo + size, rom_len)
+        scan_lo = start
+        if own_lo > start:
+            b = _find_break(rom_data, own_lo, start, rom_len, breaks, backward=True)
+            if b is not None:
+                scan_lo = b + 1
+        scan_hi = _find_break(rom_data, own_hi, start, rom_len, breaks, backward=False)
+        if scan_hi is None:
+            scan_hi = rom_len
+        shards.append((scan_lo, scan_hi, own_lo, own_hi))
+    return shards
+
+
+def dump_all_sjis(rom_path, charset=None, workers=1):
+    """
+    扫描 ROM 中的 Shift-JIS 片段。workers > 1 时按 plan_shards 分片，
+    在进程池中扫描后按分片顺序（即 offset 顺序）合并，结果与单进程完全一致。
+    """
+    if not os.path.exists(rom_path) or os.path.getsize(rom_path) <= START_OFFSET:
+        return []
 
     print(f"从 {hex(START_OFFSET)} 开始精准扫描...")
 
-    while offset < rom_len:
-        chunk_start = offset
-        temp_hex = []
-        temp_text = ""
-        
-        while offset < rom_len:
-            b1 = int(rom_data[offset])
-
-            # 1. 双字节 SJIS
-            if (0x81 <= b1 <= 0x9F) or (0xE0 <= b1 <= 0xEF):
-                if offset + 1 < rom_len:
-                    b2 = int(rom_data[offset + 1])
-                    try:
-                        char = rom_data[offset:offset+2].decode('shift-jis')
-                        if charset is not None and char not in charset:
-                            break
-                        temp_text += char
-                        temp_hex.extend([b1, b2])
-                        offset += 2
-                        continue
-                    except UnicodeDecodeError: break
-                else: break
-
-            # 2. 半角区域 (ASCII & 半角片假名)
-            elif (0x20 <= b1 <= 0x7E) or (0xA1 <= b1 <= 0xDF):
-                try:
-                    char = rom_data[offset:offset+1].decode('shift-jis')
-                    if charset is not None and b1 > 0x7F:
-                        if char not in charset: break
-                    temp_text += char
-                    temp_hex.append(b1)
-                    offset += 1
-                    continue
-                except: break
-            
-            # 3. 遇到非文字（CMD、0x00等）立即断开
-            else:
-                break
+    luts = build_sjis_luts(charset)
+    with RomImage(rom_path) as rom:
+        if workers <= 1:
+            return _dump_range(rom.buffer, START_OFFSET, len(rom), START_OFFSET, len(rom), luts)
+        shards = plan_shards(rom.buffer, START_OFFSET, workers, luts)
+    print(f"分 {len(shards)} 片，{workers} 进程并行扫描...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_dump_shard, rom_path, *shard, charset) for shard in shards]
+        return [item for future in futures for item in future.result()]
 
-        # --- 片段准入过滤 ---
-        if len(temp_hex) >= MIN_TEXT_LEN:
-            # 统计这个片段里到底有多少个“真文字”
-            meaningful_chars = MEANINGFUL_CHAR_PATTERN.findall(temp_text)
-            
-            # 过滤掉像 rも$ 这种只有一个假名带一堆符号的残余
-            # 真正的台词至少会有两个以上的汉字或假名
-            if len(meaningful_chars) >= 2:
-                raw_results.append({
-                    "offset": chunk_start,
-                    "length": len(temp_hex),
-                    "hex": bytes(temp_hex).hex().upper(),
-                    "original": temp_text,
-                    "translation": ""
-                })
-        
-        offset += 1 # 继续步进
-        
-    return raw_results
 def filter_noise(data_list, cluster_threshold=0x200):
     if not data_list: return []
     
@@ -189,15 +387,20 @@ def save_chunks(data_list):
     print(f"已保存 {num_chunks} 个文件到 {OUTPUT_DIR}")
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="扫描 ROM 中的 Shift-JIS 文本并分卷导出为 JSON")
+    parser.add_argument("--workers", type=int, default=1, help="并行扫描的进程数（默认 1，单进程）")
+    args = parser.parse_args()
+
     # 1. 加载你的码表文件
     # 建议你先导出一份当前游戏的字表（包含日文假名和常用汉字）
-    my_charset = load_binary_charset("python/debug/charsets.binary") 
+    my_charset = load_charset_bitmap("python/debug/charsets.binary")
     
     # 2. 执行带字符校验的扫描
-    raw_data = dump_all_sjis(ROM_PATH, charset=my_charset)
+    raw_data = dump_all_sjis(ROM_PATH, charset=my_charset, workers=args.workers)
     
     # 3. 空间连续性过滤
     final_data = filter_noise(raw_data)
     
     # 4. 分卷保存
-    save_chunks(final_data)
\ No newline at end of file
+    save_chunks(final_data)
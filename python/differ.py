@@ -4,19 +4,29 @@ Diff two binary files and output differing regions as JSON array.
 
 Example:
     python differ.py patched.gba rom.gba -o ../patcher/diff.json
+    python differ.py patched.gba rom.gba -o ../patcher/diff.json --merge-gap 8 --gap-report
+    python differ.py patched.gba rom.gba -o ../patcher/diff.json --bin ../patcher/diff.bin
+    python differ.py patched.gba rom.gba -o ../patcher/diff.json --bin ../patcher/diff.bin --stream
 """
 
 import json
 from pathlib import Path
 
 import click
+import numpy as np
 
+from binpatch import PatchWriter, encode_patch
+from rom_image import RomImage
 
-def diff_binaries(data_a: bytes, data_b: bytes) -> list[dict]:
+
+def diff_binaries(data_a: bytes | memoryview, data_b: bytes | memoryview, merge_gap: int = 0) -> list[dict]:
     """
     比较两个二进制数据，返回差异列表。
     每个元素: {"pos": "0x1234", "bytes": [u16, ...]}
     pos 为起始位置的十六进制地址，bytes 为该段差异的字节值（以 u16 形式存储 0-255）。
+    重叠部分取第一个文件的字节；长度不同时，超出部分全部算作差异，取较长一方的字节。
+    merge_gap > 0 时，间隔不超过 merge_gap 个相同字节的相邻差异段合并为一段（间隔字节原样带上），
+    打到第二个文件上的结果不变，但条目更少。
 
     Example:
         data_a = bytes([0x00, 0x01, 0x02, 0x03])
@@ -24,45 +34,267 @@ def diff_binaries(data_a: bytes, data_b: bytes) -> list[dict]:
         diff_binaries(data_a, data_b)
         # => [{"pos": "0x0001", "bytes": [255, 254]}]
     """
-    result = []
-    i = 0
-    max_len = max(len(data_a), len(data_b))
-
-    while i < max_len:
-        byte_a = data_a[i] if i < len(data_a) else None
-        byte_b = data_b[i] if i < len(data_b) else None
-
-        if byte_a != byte_b:
-            start = i
-            bytes_in_run = []
-            while i < max_len:
-                ba = data_a[i] if i < len(data_a) else None
-                bb = data_b[i] if i < len(data_b) else None
-                if ba != bb:
-                    # 取第一个文件的字节值作为 diff 内容（0-255 用 u16 存）
-                    bytes_in_run.append(ba if ba is not None else (bb if bb is not None else 0))
-                    i += 1
-                else:
-                    break
-            result.append({
-                "pos": f"0x{start:04X}",
-                "bytes": bytes_in_run,
-            })
-        else:
-            i += 1
-
-    return result
+    starts, ends, values = _diff_runs(data_a, data_b)
+    starts, ends = merge_runs(starts, ends, merge_gap)
+    return [
+        {"pos": f"0x{start:04X}", "bytes": values[start:end].tolist()}
+        for start, end in zip(starts.tolist(), ends.tolist())
+    ]
+
+
+def diff_records(data_a: bytes | memoryview, data_b: bytes | memoryview, merge_gap: int = 0) -> list[tuple[int, bytes]]:
+    """与 diff_binaries 相同的差异段，以 [(offset, data), ...] 返回，供 binpatch.encode_patch 使用。"""
+    starts, ends, values = _diff_runs(data_a, data_b)
+    starts, ends = merge_runs(starts, ends, merge_gap)
+    return [(start, values[start:end].tobytes()) for start, end in zip(starts.tolist(), ends.tolist())]
+
+
+def _diff_runs(data_a: bytes | memoryview, data_b: bytes | memoryview) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    向量化求差异区间：对重叠部分做逐字节不等掩码，超出部分整段记为不等，
+    再由掩码的上升/下降沿（np.diff + flatnonzero）得到各段 [start, end)。
+    返回 (starts, ends, values)，values 为整条结果字节数组（np.uint8），按 [start:end] 切片取值。
+    """
+    a = np.frombuffer(data_a, dtype=np.uint8)
+    b = np.frombuffer(data_b, dtype=np.uint8)
+    common = min(len(a), len(b))
+    longer = a if len(a) >= len(b) else b
+    mask = np.ones(len(longer), dtype=np.int8)
+    np.not_equal(a[:common], b[:common], out=mask[:common], casting="unsafe")
+    if len(longer) > common and longer is b:
+        values = np.concatenate([a[:common], b[common:]])
+    else:
+        values = a
+    edges = np.flatnonzero(np.diff(mask, prepend=0, append=0))
+    return edges[0::2], edges[1::2], values
+
+
+def merge_runs(starts: np.ndarray, ends: np.ndarray, merge_gap: int) -> tuple[np.ndarray, np.ndarray]:
+    """把间隔（上一段 end 到下一段 start）不超过 merge_gap 的相邻段合并。"""
+    if merge_gap <= 0 or len(starts) < 2:
+        return starts, ends
+    split = np.flatnonzero(starts[1:] - ends[:-1] > merge_gap)
+    return starts[np.r_[0, split + 1]], ends[np.r_[split, len(ends) - 1]]
+
+
+# 0-255 写成十进制的字符数
+_DIGITS = np.array([len(str(v)) for v in range(256)], dtype=np.int64)
+
+
+def json_size(starts: np.ndarray, ends: np.ndarray, values: np.ndarray) -> int:
+    """不实际序列化，按 json.dumps 的默认分隔符精确计算 diff 列表的 JSON 字节数。"""
+    if not len(starts):
+        return 2
+    digits = np.concatenate([[0], np.cumsum(_DIGITS[values])])
+    lengths = ends - starts
+    pos_len = np.array([len(f"0x{start:04X}") for start in starts.tolist()], dtype=np.int64)
+    per_run = len('{"pos": "", "bytes": []}') + pos_len + (digits[ends] - digits[starts]) + 2 * (lengths - 1)
+    return int(per_run.sum()) + 2 * (len(starts) - 1) + 2
+
+
+def gap_tradeoff(
+    data_a: bytes | memoryview, data_b: bytes | memoryview, gaps: list[int]
+) -> list[tuple[int, int, int, int]]:
+    """对每个 merge_gap 求 (gap, 条目数, 带上的相同字节数, JSON 字节数)，用于挑选合适的间隔。"""
+    starts, ends, values = _diff_runs(data_a, data_b)
+    changed = int((ends - starts).sum())
+    rows = []
+    for gap in gaps:
+        s, e = merge_runs(starts, ends, gap)
+        rows.append((gap, len(s), int((e - s).sum()) - changed, json_size(s, e, values)))
+    return rows
+
+
+# --- 流式差异：按块读取两个文件，峰值内存只与块大小有关 ---
+# 每块读取的字节数
+DEFAULT_BLOCK_SIZE = 1 << 20
+# 流式写二进制补丁时单条记录的最大字节数（更长的差异段拆成 gap=0 的连续记录）
+STREAM_RECORD_SIZE = 1 << 16
+# 0-255 的十进制写法，用于直接拼 JSON
+_DECIMAL = [str(v) for v in range(256)]
+
+
+class _JsonRunSink:
+    """把差异段逐段写成与 json.dumps(diff_binaries(...)) 完全相同的文本。"""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+        self._empty = True
+        f.write("[")
+
+    def begin(self, pos: int) -> None:
+        self.f.write(f'{", " if self.count else ""}{{"pos": "0x{pos:04X}", "bytes": [')
+        self.count += 1
+        self._empty = True
+
+    def extend(self, data: np.ndarray) -> None:
+        if not len(data):
+            return
+        text = ", ".join(map(_DECIMAL.__getitem__, data.tolist()))
+        self.f.write(text if self._empty else ", " + text)
+        self._empty = False
+
+    def end(self) -> None:
+        self.f.write("]}")
+
+    def close(self) -> None:
+        self.f.write("]")
+
+
+class _BinRunSink:
+    """把差异段写入 PatchWriter，段内数据攒满 STREAM_RECORD_SIZE 即落一条记录。"""
+
+    def __init__(self, writer: PatchWriter):
+        self.writer = writer
+        self._pos = 0
+        self._buf = bytearray()
+
+    def begin(self, pos: int) -> None:
+        self._pos = pos
+
+    def extend(self, data: np.ndarray) -> None:
+        self._buf += data.tobytes()
+        while len(self._buf) >= STREAM_RECORD_SIZE:
+            self._flush(STREAM_RECORD_SIZE)
+
+    def end(self) -> None:
+        if self._buf:
+            self._flush(len(self._buf))
+
+    def _flush(self, size: int) -> None:
+        self.writer.add(self._pos, bytes(self._buf[:size]))
+        del self._buf[:size]
+        self._pos += size
+
+
+def _iter_blocks(path_a: Path, path_b: Path, block_size: int):
+    """
+    按块同步读取两个文件，逐块产出 (块起始 offset, 不等掩码, 取值)；两块缓冲区循环复用。
+    重叠部分取第一个文件的字节，较短文件读完后的部分整段记为不等，取较长一方的字节（与 diff_binaries 一致）。
+    """
+    buf_a = bytearray(block_size)
+    buf_b = bytearray(block_size)
+    offset = 0
+    with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+        while True:
+            na = fa.readinto(buf_a)
+            nb = fb.readinto(buf_b)
+            n = max(na, nb)
+            if n == 0:
+                return
+            a = np.frombuffer(buf_a, dtype=np.uint8, count=na)
+            b = np.frombuffer(buf_b, dtype=np.uint8, count=nb)
+            common = min(na, nb)
+            mask = np.ones(n, dtype=bool)
+            np.not_equal(a[:common], b[:common], out=mask[:common])
+            values = a if na >= nb else np.concatenate([a[:common], b[common:]])
+            yield offset, mask, values
+            offset += n
+
+
+def stream_diff(
+    path_a: Path,
+    path_b: Path,
+    out_path: Path,
+    bin_path: Path | None = None,
+    merge_gap: int = 0,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    compress: bool = True,
+) -> int:
+    """
+    流式比较两个文件：按 block_size 分块读取，跨块的差异段与合并间隔由状态机延续，
+    差异记录边算边写入 out_path（JSON，内容与非流式输出一致）及可选的二进制补丁。
+    至多缓存 merge_gap 个间隔字节，峰值内存与 ROM 大小、差异大小无关。返回差异段数。
+    """
+    with open(out_path, "w", encoding="utf-8") as f:
+        sinks: list = [_JsonRunSink(f)]
+        writer = PatchWriter(bin_path, compress=compress) if bin_path else None
+        if writer is not None:
+            sinks.append(_BinRunSink(writer))
+        in_run = False
+        pending: list[np.ndarray] = []
+        pending_len = 0
+        for base, mask, values in _iter_blocks(path_a, path_b, block_size):
+            cuts = np.flatnonzero(mask[1:] != mask[:-1]) + 1
+            bounds = [0, *cuts.tolist(), len(mask)]
+            differ_first = bool(mask[0])
+            for k in range(len(bounds) - 1):
+                lo, hi = bounds[k], bounds[k + 1]
+                if (k % 2 == 0) == differ_first:
+                    if not in_run:
+                        for sink in sinks:
+                            sink.begin(base + lo)
+                        in_run = True
+                    for chunk in pending:
+                        for sink in sinks:
+                            sink.extend(chunk)
+                    pending, pending_len = [], 0
+                    for sink in sinks:
+                        sink.extend(values[lo:hi])
+                elif in_run:
+                    pending_len += hi - lo
+                    if pending_len <= merge_gap:
+                        pending.append(values[lo:hi].copy())
+                    else:
+                        for sink in sinks:
+                            sink.end()
+                        in_run = False
+                        pending, pending_len = [], 0
+        if in_run:
+            for sink in sinks:
+                sink.end()
+        sinks[0].close()
+    if writer is not None:
+        writer.close()
+    return sinks[0].count
+
+
+# --gap-report 默认比较的间隔
+REPORT_GAPS = [0, 1, 2, 4, 8, 16, 32, 64]
 
 
 @click.command()
 @click.argument("bin_a", type=click.Path(exists=True, path_type=Path))
 @click.argument("bin_b", type=click.Path(exists=True, path_type=Path))
 @click.option("-o", "--out", "out_path", required=True, type=click.Path(path_type=Path), help="输出 JSON 文件路径")
-def main(bin_a: Path, bin_b: Path, out_path: Path) -> None:
-    """比较两个二进制文件 BIN_A 与 BIN_B，将差异写入 OUT 指定的 JSON 文件。"""
-    data_a = bin_a.read_bytes()
-    data_b = bin_b.read_bytes()
-    diffs = diff_binaries(data_a, data_b)
+@click.option("--merge-gap", type=click.IntRange(min=0), default=0, show_default=True, help="间隔不超过 N 个相同字节的差异段合并为一条（相同字节原样带上）")
+@click.option("--gap-report", is_flag=True, help="输出不同 merge-gap 下的条目数与 JSON 大小对比")
+@click.option("--bin", "bin_path", type=click.Path(path_type=Path), help="同时输出二进制补丁（格式见 binpatch.py），供网页 Patcher 与 patch.py --prepatch 使用")
+@click.option("--compress/--no-compress", default=True, show_default=True, help="二进制补丁是否 zlib 压缩")
+@click.option("--stream", is_flag=True, help="流式比较：按块读取、边算边写，峰值内存与 ROM/差异大小无关")
+@click.option("--block-size", type=click.IntRange(min=1), default=DEFAULT_BLOCK_SIZE, show_default=True, help="--stream 时每块读取的字节数")
+def main(
+    bin_a: Path,
+    bin_b: Path,
+    out_path: Path,
+    merge_gap: int,
+    gap_report: bool,
+    bin_path: Path | None,
+    compress: bool,
+    stream: bool,
+    block_size: int,
+) -> None:
+    """比较两个二进制文件 BIN_A 与 BIN_B，将差异写入 OUT 指定的 JSON 文件（可选同时写二进制补丁）。"""
+    if stream:
+        if gap_report:
+            raise click.UsageError("--gap-report 需要整体比较，不能与 --stream 同时使用")
+        count = stream_diff(bin_a, bin_b, out_path, bin_path, merge_gap, block_size, compress)
+        click.echo(f"共 {count} 处差异，已流式写入 {out_path}" + (f" 与 {bin_path}" if bin_path else ""))
+        return
+    with RomImage(bin_a) as rom_a, RomImage(bin_b) as rom_b:
+        with rom_a.view() as data_a, rom_b.view() as data_b:
+            diffs = diff_binaries(data_a, data_b, merge_gap=merge_gap)
+            if gap_report:
+                gaps = sorted(set(REPORT_GAPS) | {merge_gap})
+                click.echo("merge-gap    条目数    带上相同字节    JSON 大小")
+                for gap, runs, carried, size in gap_tradeoff(data_a, data_b, gaps):
+                    mark = " *" if gap == merge_gap else ""
+                    click.echo(f"{gap:>9} {runs:>9} {carried:>15} {size / 1024:>10.1f}KB{mark}")
+            if bin_path:
+                packed = encode_patch(diff_records(data_a, data_b, merge_gap), compress=compress)
+                bin_path.write_bytes(packed)
+                click.echo(f"二进制补丁 {len(packed) / 1024:.1f}KB，已写入 {bin_path}")
     out_path.write_text(json.dumps(diffs, ensure_ascii=False), encoding="utf-8")
     click.echo(f"共 {len(diffs)} 处差异，已写入 {out_path}")
 
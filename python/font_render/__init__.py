@@ -0,0 +1 @@
+"""GBA 字模渲染（8x8 / 8x16），patch.py 与 debug 下的预览脚本共用。"""
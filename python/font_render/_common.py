@@ -0,0 +1,11 @@
+"""font_8x8 / font_8x16 共用的 NumPy 辅助函数。"""
+import numpy as np
+
+
+def ft_bitmap_to_np(bmp):
+    """把 FreeType MONO 位图（每行 pitch 字节、1bit 打包）转为 (h, w) 的 0/1 数组。"""
+    w, h, pitch = bmp.width, bmp.rows, bmp.pitch
+    if w == 0 or h == 0:
+        return np.zeros((h, w), dtype=np.uint8)
+    rows = np.asarray(bmp.buffer, dtype=np.uint8).reshape(h, pitch)
+    return np.unpackbits(rows, axis=1)[:, :w]
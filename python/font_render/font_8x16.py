@@ -0,0 +1,171 @@
+"""
+8x16 字模：FreeType MONO 渲染 → 16 宽压 8 宽或 8x12 缩放/填充 → GBA 4bpp（每字 2 个 tile）。
+供 patch.py 直接 import；freetype / PIL 只在真正渲染或出预览图时才导入。
+"""
+import numpy as np
+
+from ._common import ft_bitmap_to_np
+
+INK, BG = 3, 0x11
+
+def ft_render_mono(face, ch, px_size=16, cell_size=None):
+    """
+    cell_size: 可选 (width, height)，如 (8, 12) 表示指定 8×12 格；不传则仅用 px_size 作为高度、宽度由字体比例决定。
+    """
+    import freetype
+    if cell_size is not None:
+        cw, ch_h = cell_size
+        face.set_pixel_sizes(cw, ch_h)
+    else:
+        face.set_pixel_sizes(0, px_size)
+    face.load_char(ch, freetype.FT_LOAD_RENDER | freetype.FT_LOAD_TARGET_MONO)
+    bmp = face.glyph.bitmap
+    w, h = bmp.width, bmp.rows
+    buf = bmp.buffer
+    pitch = bmp.pitch
+
+    px = [[0]*w for _ in range(h)]
+    for y in range(h):
+        row = buf[y*pitch:(y+1)*pitch]
+        for x in range(w):
+            byte = row[x >> 3]
+            bit = (byte >> (7 - (x & 7))) & 1
+            px[y][x] = bit
+    return px, w, h
+
+def blit_center(src, sw, sh, dw, dh, xoff=0, yoff=0):
+    dst = [[0]*dw for _ in range(dh)]
+    ox = (dw - sw)//2 + xoff
+    oy = (dh - sh)//2 + yoff
+    for y in range(sh):
+        ty = oy + y
+        if 0 <= ty < dh:
+            row = src[y]
+            for x in range(sw):
+                tx = ox + x
+                if 0 <= tx < dw:
+                    dst[ty][tx] = row[x]
+    return dst
+
+def compress_16w_to_8w(src16x16, mode="or"):
+    """
+    把 16x16 压成 8x16：每 2 列合并成 1 列
+    mode:
+      - "or"  : 2列任意有墨就算有（推荐，细线更不容易丢）
+      - "and" : 2列都要有才算有（更细但容易断）
+      - "major": 2列>=1 算有（等价 or，留个口子以后扩）
+    """
+    return compress_16w_to_8w_h(src16x16, height=16, mode=mode)
+
+
+def compress_16w_to_8w_h(src_16wide, height, mode="or"):
+    """把 16×height 压成 8×height：每 2 列合并成 1 列。"""
+    out = [[0] * 8 for _ in range(height)]
+    for y in range(height):
+        for x in range(8):
+            a = src_16wide[y][2 * x]
+            b = src_16wide[y][2 * x + 1]
+            if mode == "and":
+                out[y][x] = 1 if (a and b) else 0
+            else:
+                out[y][x] = 1 if (a or b) else 0
+    return out
+
+
+def scale_8x12_to_8x16(grid_8x12):
+    """将 8×12 点阵最近邻缩放到 8×16。"""
+    out = [[0] * 8 for _ in range(16)]
+    for y in range(16):
+        sy = int(y * 12 / 16)
+        if sy >= 12:
+            sy = 11
+        out[y] = grid_8x12[sy][:]
+    return out
+
+
+def pad_8x12_to_8x16(grid_8x12):
+    """将 8×12 点阵垂直居中填充到 8×16（上下各 2 行空白）。"""
+    out = [[0] * 8 for _ in range(16)]
+    for y in range(12):
+        out[y + 2][:] = grid_8x12[y]
+    return out
+
+def tile01_to_gba4bpp(tile01_8x8, ink=3, bg=BG):
+    ink &= 0xF
+    bg &= 0xF
+    out = bytearray()
+    for y in range(8):
+        for x in range(0, 8, 2):
+            p0 = ink if tile01_8x8[y][x] else bg
+            p1 = ink if tile01_8x8[y][x+1] else bg
+            out.append(((p1 & 0xF) << 4) | (p0 & 0xF))
+    return bytes(out)
+
+def glyph8x16_to_gba4bpp(g8x16, ink=3, bg=BG):
+    top = [row[:] for row in g8x16[:8]]
+    bot = [row[:] for row in g8x16[8:]]
+    return tile01_to_gba4bpp(top, ink, bg) + tile01_to_gba4bpp(bot, ink, bg)
+
+# --- NumPy 路径：像素为 np.uint8 0/1 数组，可整叠 (N, 16, 8) 处理 ---
+
+def ft_render_mono_np(face, ch, px_size=16, cell_size=None):
+    import freetype
+    if cell_size is not None:
+        cw, ch_h = cell_size
+        face.set_pixel_sizes(cw, ch_h)
+    else:
+        face.set_pixel_sizes(0, px_size)
+    face.load_char(ch, freetype.FT_LOAD_RENDER | freetype.FT_LOAD_TARGET_MONO)
+    return ft_bitmap_to_np(face.glyph.bitmap)
+
+def blit_center_np(src, dw, dh, xoff=0, yoff=0):
+    """与 blit_center 相同的居中贴图与裁切，用切片完成。"""
+    sh, sw = src.shape
+    dst = np.zeros((dh, dw), dtype=np.uint8)
+    ox = (dw - sw)//2 + xoff
+    oy = (dh - sh)//2 + yoff
+    y0, y1 = max(0, -oy), min(sh, dh - oy)
+    x0, x1 = max(0, -ox), min(sw, dw - ox)
+    if y0 < y1 and x0 < x1:
+        dst[oy + y0:oy + y1, ox + x0:ox + x1] = src[y0:y1, x0:x1]
+    return dst
+
+def compress_16w_to_8w_np(src_16wide, mode="or"):
+    """(..., H, 16) → (..., H, 8)：每 2 列合并成 1 列，mode 同 compress_16w_to_8w。"""
+    pairs = np.asarray(src_16wide, dtype=bool).reshape(*np.shape(src_16wide)[:-1], 8, 2)
+    merged = pairs.all(axis=-1) if mode == "and" else pairs.any(axis=-1)
+    return merged.astype(np.uint8)
+
+# 8×12 → 8×16 最近邻缩放时每个目标行对应的源行（与 scale_8x12_to_8x16 一致）
+_SCALE_8x12_ROWS = np.minimum(np.arange(16) * 12 // 16, 11)
+
+def scale_8x12_to_8x16_np(grids_8x12):
+    """(..., 12, 8) → (..., 16, 8) 最近邻缩放。"""
+    return np.asarray(grids_8x12)[..., _SCALE_8x12_ROWS, :]
+
+def pad_8x12_to_8x16_np(grids_8x12):
+    """(..., 12, 8) → (..., 16, 8) 垂直居中填充（上下各 2 行空白）。"""
+    grids_8x12 = np.asarray(grids_8x12, dtype=np.uint8)
+    out = np.zeros((*grids_8x12.shape[:-2], 16, 8), dtype=np.uint8)
+    out[..., 2:14, :] = grids_8x12
+    return out
+
+def glyphs8x16_to_gba4bpp_np(glyphs8x16, ink=3, bg=BG):
+    """(N, 16, 8) 字模叠批量转 GBA 4bpp：每字上 8 行、下 8 行各一个 32 字节 tile，共 64 字节。"""
+    px = np.where(np.asarray(glyphs8x16, dtype=bool), ink & 0xF, bg & 0xF).astype(np.uint8)
+    return (px[..., 0::2] | (px[..., 1::2] << 4)).tobytes()
+
+def make_preview_8x16(glyphs01, cols=32, scale=8):
+    from PIL import Image  # 只有预览需要 PIL
+    rows = (len(glyphs01) + cols - 1)//cols
+    img = Image.new("L", (cols*8, rows*16), 0)
+    for i, g in enumerate(glyphs01):
+        tx, ty = (i % cols)*8, (i//cols)*16
+        for y in range(16):
+            for x in range(8):
+                if g[y][x]:
+                    img.putpixel((tx+x, ty+y), 255)
+    return img.resize((img.width*scale, img.height*scale), Image.NEAREST)
+
+def hex_dump(data: bytes):
+    return " ".join(f"{b:02X}" for b in data)
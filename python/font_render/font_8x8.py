@@ -0,0 +1,105 @@
+"""
+8x8 字模：FreeType MONO 渲染 → 8x8 0/1 tile → GBA 4bpp。
+供 patch.py 直接 import；freetype / PIL 只在真正渲染或出预览图时才导入。
+"""
+import numpy as np
+
+from ._common import ft_bitmap_to_np
+
+INK, BG = 3, 0x11
+
+def ft_render_mono(face, ch, px_size=8):
+    import freetype
+    face.set_pixel_sizes(0, px_size)
+    face.load_char(ch, freetype.FT_LOAD_RENDER | freetype.FT_LOAD_TARGET_MONO)
+    bmp = face.glyph.bitmap
+    w, h = bmp.width, bmp.rows
+    buf = bmp.buffer  # 1-bit packed, each row is pitch bytes
+    pitch = bmp.pitch
+
+    # 转成 0/1 像素
+    px = [[0]*w for _ in range(h)]
+    for y in range(h):
+        row = buf[y*pitch:(y+1)*pitch]
+        for x in range(w):
+            byte = row[x >> 3]
+            bit = (byte >> (7 - (x & 7))) & 1
+            px[y][x] = bit
+    return px, w, h
+
+def blit_center(src, sw, sh, dw=8, dh=8, xoff=0, yoff=0):
+    # 居中贴到 8x8，超出则裁切
+    dst = [[0]*dw for _ in range(dh)]
+    ox = (dw - sw)//2 + xoff
+    oy = (dh - sh)//2 + yoff
+    for y in range(sh):
+        ty = oy + y
+        if 0 <= ty < dh:
+            row = src[y]
+            for x in range(sw):
+                tx = ox + x
+                if 0 <= tx < dw:
+                    dst[ty][tx] = row[x]
+    return dst
+
+
+def px_to_tile_8x8(px, w, h):
+    """将渲染结果转为 8x8 tile：若已是 8x8 则直接用，否则居中贴到 8x8（会 pad）。"""
+    if w == 8 and h == 8:
+        return px
+    return blit_center(px, w, h, 8, 8)
+
+def tile01_to_gba4bpp(tile01, ink=3, bg=BG):
+    # 强制保证在 0..15
+    ink &= 0xF
+    bg &= 0xF
+
+    out = bytearray()
+    for y in range(8):
+        for x in range(0, 8, 2):
+            b0 = 1 if tile01[y][x] else 0
+            b1 = 1 if tile01[y][x+1] else 0
+            p0 = ink if b0 else bg
+            p1 = ink if b1 else bg
+            out.append(((p1 & 0xF) << 4) | (p0 & 0xF))
+    return bytes(out)
+
+# --- NumPy 路径：像素为 np.uint8 0/1 数组，可整叠 (N, 8, 8) 处理 ---
+
+def ft_render_mono_np(face, ch, px_size=8):
+    import freetype
+    face.set_pixel_sizes(0, px_size)
+    face.load_char(ch, freetype.FT_LOAD_RENDER | freetype.FT_LOAD_TARGET_MONO)
+    return ft_bitmap_to_np(face.glyph.bitmap)
+
+def blit_center_np(src, dw=8, dh=8, xoff=0, yoff=0):
+    """与 blit_center 相同的居中贴图与裁切，用切片完成。"""
+    sh, sw = src.shape
+    dst = np.zeros((dh, dw), dtype=np.uint8)
+    ox = (dw - sw)//2 + xoff
+    oy = (dh - sh)//2 + yoff
+    y0, y1 = max(0, -oy), min(sh, dh - oy)
+    x0, x1 = max(0, -ox), min(sw, dw - ox)
+    if y0 < y1 and x0 < x1:
+        dst[oy + y0:oy + y1, ox + x0:ox + x1] = src[y0:y1, x0:x1]
+    return dst
+
+def tiles01_to_gba4bpp_np(tiles01, ink=3, bg=BG):
+    """(..., 8, 8) 的 0/1 tile 叠批量转 GBA 4bpp：每行 4 字节，低 nibble 为左像素。"""
+    px = np.where(np.asarray(tiles01, dtype=bool), ink & 0xF, bg & 0xF).astype(np.uint8)
+    return (px[..., 0::2] | (px[..., 1::2] << 4)).tobytes()
+
+def make_preview(tiles01, cols=32, scale=8):
+    from PIL import Image  # 只有预览需要 PIL
+    rows = (len(tiles01) + cols - 1)//cols
+    img = Image.new("L", (cols*8, rows*8), 0)
+    for i, t in enumerate(tiles01):
+        tx, ty = (i % cols)*8, (i//cols)*8
+        for y in range(8):
+            for x in range(8):
+                if t[y][x]:
+                    img.putpixel((tx+x, ty+y), 255)
+    return img.resize((img.width*scale, img.height*scale), Image.NEAREST)
+
+def hex_dump(data: bytes):
+    return " ".join(f"{b:02X}" for b in data)
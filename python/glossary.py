@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+术语匹配：把全部日文术语编译成 Aho–Corasick 自动机，对一批原文各扫一遍即可找出所有术语出现位置
+（含相互重叠、互为前后缀的术语），不依赖原文里的空格分词。
+
+Example:
+    matcher = GlossaryMatcher(["うずまき", "ナルト", "うずまきナルト"])
+    matcher.find("うずまきナルトだってばよ")
+    # -> [(0, "うずまき"), (0, "うずまきナルト"), (4, "ナルト")]
+"""
+
+from collections import deque
+from typing import Iterable
+
+
+class GlossaryMatcher:
+    """多模式精确匹配（区分大小写）。空串与重复术语会被忽略。"""
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms: list[str] = list(dict.fromkeys(t for t in terms if t))
+        # 结点 0 为根；_goto[s][ch] -> 子结点，_fail[s] -> 失配跳转，_out[s] -> 在 s 结束的术语下标（含失配链上的）
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        for i, term in enumerate(self.terms):
+            s = 0
+            for ch in term:
+                nxt = self._goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[s][ch] = nxt
+                s = nxt
+            self._out[s].append(i)
+        self._build_fail()
+
+    def _build_fail(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, t in self._goto[s].items():
+                queue.append(t)
+                f = self._fail[s]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[t] = target if target != t else 0
+                # 失配结点按 BFS 顺序先于 t 处理完，其输出已是完整的
+                self._out[t] = self._out[t] + self._out[self._fail[t]]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def find(self, text: str) -> list[tuple[int, str]]:
+        """返回 text 中所有术语出现 [(起始下标, 术语), ...]，按起始下标、再按术语长度升序。"""
+        goto, fail, out, terms = self._goto, self._fail, self._out, self.terms
+        found = []
+        s = 0
+        for pos, ch in enumerate(text):
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            for i in out[s]:
+                found.append((pos + 1 - len(terms[i]), terms[i]))
+        found.sort(key=lambda hit: (hit[0], len(hit[1])))
+        return found
+
+    def find_all(self, texts: Iterable[str]) -> list[tuple[int, int, str]]:
+        """对一批原文逐条匹配，返回 [(原文下标, 起始下标, 术语), ...]。"""
+        return [(n, start, term) for n, text in enumerate(texts) for start, term in self.find(text or "")]
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+字模缓存：把渲染好的 4bpp tile（8x8 为 32 字节，8x16 为 64 字节）按内容寻址存进 SQLite，
+键为 (命名空间, 码位)，命名空间由字体文件 hash、像素尺寸、8x16 缩放方式、ink/bg 等组成。
+字体与参数不变时，只有新出现的字需要重新渲染。按最近使用时间做容量上限内的 LRU 淘汰。
+
+Example:
+    with GlyphCache(".cache/glyphs.sqlite") as cache:
+        ns = glyph_namespace("font.ttf", "8x16", px_size=12, mode="pad", ink=3, bg=1)
+        tiles = cache.get_many(ns, ["火", "影"])
+        cache.put_many(ns, {"忍": tile_bytes})
+        print(cache.hits, cache.misses)
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable
+
+# 渲染管线有不兼容改动时递增，旧缓存自然失效
+GLYPH_CACHE_VERSION = 1
+# 默认容量上限（tile 字节总数）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# 按码位查询时每条 SQL 的 IN (...) 参数个数（低于旧版 SQLite 的 999 个变量上限）
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS glyphs (
+    ns TEXT NOT NULL,
+    cp INTEGER NOT NULL,
+    tile BLOB NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (ns, cp)
+);
+CREATE INDEX IF NOT EXISTS glyphs_used ON glyphs (used);
+"""
+
+
+def file_sha256(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def glyph_namespace(font_path: str | Path, kind: str, px_size: int, mode: str, ink: int, bg: int) -> str:
+    """字体内容 + 渲染参数 → 命名空间字符串。字体文件改名不影响命中，内容变了即失效。"""
+    return f"v{GLYPH_CACHE_VERSION}:{kind}:{file_sha256(font_path)}:{px_size}:{mode}:{ink & 0xF}:{bg & 0xF}"
+
+
+class GlyphCache:
+    """SQLite 字模缓存，记录本次会话的命中/未命中/淘汰数。"""
+
+    def __init__(self, path: str | Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "GlyphCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def get_many(self, namespace: str, chars: Iterable[str]) -> dict[str, bytes]:
+        """取出 chars 中已缓存的 tile，返回 {char: tile}，并刷新这些条目的最近使用时间。"""
+        wanted = {ord(ch): ch for ch in chars}
+        codes = list(wanted)
+        found = {}
+        for i in range(0, len(codes), _LOOKUP_CHUNK):
+            chunk = codes[i : i + _LOOKUP_CHUNK]
+            rows = self._db.execute(
+                f"SELECT cp, tile FROM glyphs WHERE ns = ? AND cp IN ({','.join('?' * len(chunk))})",
+                (namespace, *chunk),
+            )
+            found.update((wanted[cp], bytes(tile)) for cp, tile in rows)
+        self.hits += len(found)
+        self.misses += len(wanted) - len(found)
+        if found:
+            now = time.time()
+            with self._db:
+                self._db.executemany(
+                    "UPDATE glyphs SET used = ? WHERE ns = ? AND cp = ?",
+                    ((now, namespace, ord(ch)) for ch in found),
+                )
+        return found
+
+    def put_many(self, namespace: str, tiles: dict[str, bytes]) -> None:
+        """写入新渲染的 tile，超出容量上限时淘汰最久未用的条目。"""
+        if not tiles:
+            return
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO glyphs (ns, cp, tile, used) VALUES (?, ?, ?, ?)",
+                ((namespace, ord(ch), tile, now) for ch, tile in tiles.items()),
+            )
+        self.evict()
+
+    def size_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(LENGTH(tile)), 0) FROM glyphs").fetchone()[0]
+
+    def evict(self) -> int:
+        """按 used 从旧到新删除，直到 tile 总字节数不超过 max_bytes，返回删除条数。"""
+        excess = self.size_bytes() - self.max_bytes
+        if excess <= 0:
+            return 0
+        with self._db:
+            rows = self._db.execute("SELECT ns, cp, LENGTH(tile) FROM glyphs ORDER BY used")
+            doomed = []
+            for ns, cp, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((ns, cp))
+                excess -= size
+            self._db.executemany("DELETE FROM glyphs WHERE ns = ? AND cp = ?", doomed)
+            removed = len(doomed)
+        self.evicted += removed
+        return removed
+
+    def stats_line(self) -> str:
+        return f"字模缓存：命中 {self.hits}，未命中 {self.misses}，淘汰 {self.evicted}"
@@ -4,21 +4,126 @@ Memori 术语记忆库：用于翻译时检索与写入日文→中文术语，
 与 translate.instruction.md 中约定的工具语义一致：
 - search(query) -> {hits: [{jp, zh, note}]}
 - upsert(jp, zh, note) -> ok
+
+存储：默认为 {"terms": [...]} JSON 文件，每次 upsert 整体重写；路径后缀为 .sqlite / .db 时改用 SQLite
+（WAL 模式，jp 唯一索引），upsert 只改一行，攒够 SQLITE_BATCH 条或调用 flush()/close() 时才提交。
+两种格式可用 import_json / export_json 互转：
+  python memori_store.py import ../translate/memori.json ../translate/memori.sqlite
+  python memori_store.py export ../translate/memori.sqlite ../translate/memori.json
 """
 
 import json
 import re
+import sqlite3
 from pathlib import Path
 from typing import Any
 
+from glossary import GlossaryMatcher
+
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+# SQLite 后端攒够这么多次 upsert 提交一次事务
+SQLITE_BATCH = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    jp TEXT NOT NULL,
+    zh TEXT NOT NULL,
+    note TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS terms_jp_unique ON terms (jp);
+"""
+
+
+def _fields(record: dict[str, str]) -> tuple[str, str, str]:
+    return (
+        (record.get("jp") or "").strip(),
+        (record.get("zh") or "").strip(),
+        (record.get("note") or "").strip(),
+    )
+
+
+def _bigrams(text: str) -> set[str]:
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+def _matches(query: str, q_lower: str, jp: str, zh: str, note: str) -> bool:
+    """search 的匹配规则：忽略大小写包含于 jp/zh/note，或原样包含于 jp/zh。"""
+    return (
+        q_lower in jp.lower()
+        or q_lower in zh.lower()
+        or q_lower in note.lower()
+        or (query in jp or query in zh)
+    )
+
 
 class MemoriStore:
-    """基于 JSON 文件的 Memori 实现，支持 search 与 upsert。"""
+    """Memori 实现（JSON 或 SQLite 文件），支持 search 与 upsert。记录全部常驻内存，检索不访问磁盘。"""
 
     def __init__(self, path: str | Path):
         self.path = Path(path)
         self._records: list[dict[str, str]] = []  # [{jp, zh, note}, ...]
-        self._load()
+        # jp -> 第一条该 jp 记录的下标，upsert 不再线性查找
+        self._by_jp: dict[str, int] = {}
+        # SQLite 后端的连接与未提交的 upsert 数；JSON 后端时为 None
+        self._db: sqlite3.Connection | None = None
+        self._pending = 0
+        # 字符二元组倒排索引：bigram -> 含该 bigram 的记录下标（jp/zh/note 的小写与原文都收录）
+        self._postings: dict[str, set[int]] = {}
+        # jp 术语的 Aho–Corasick 自动机，upsert 后置空，下次匹配时再重建
+        self._matcher: GlossaryMatcher | None = None
+        if self.path.suffix.lower() in SQLITE_SUFFIXES:
+            self._open_db()
+        else:
+            self._load()
+        self._build_index()
+
+    def __enter__(self) -> "MemoriStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _record_bigrams(self, record: dict[str, str]) -> set[str]:
+        jp, zh, note = _fields(record)
+        grams = set()
+        for text in (jp, zh, note):
+            grams |= _bigrams(text.lower())
+        for text in (jp, zh):
+            grams |= _bigrams(text)
+        return grams
+
+    def _build_index(self) -> None:
+        self._postings = {}
+        self._by_jp = {}
+        self._matcher = None
+        for i, record in enumerate(self._records):
+            self._index_add(i, record)
+            self._by_jp.setdefault(_fields(record)[0], i)
+
+    def _index_add(self, i: int, record: dict[str, str]) -> None:
+        for gram in self._record_bigrams(record):
+            self._postings.setdefault(gram, set()).add(i)
+
+    def _index_remove(self, i: int, record: dict[str, str]) -> None:
+        for gram in self._record_bigrams(record):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(i)
+                if not ids:
+                    del self._postings[gram]
+
+    def _candidates(self, text: str) -> set[int]:
+        """同时含有 text 全部 bigram 的记录下标（text 至少 2 个字符）。"""
+        postings = sorted((self._postings.get(g, set()) for g in _bigrams(text)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
 
     def _load(self) -> None:
         if self.path.exists():
@@ -38,26 +143,98 @@ class MemoriStore:
         with open(self.path, "w", encoding="utf-8") as f:
             json.dump({"terms": self._records}, f, ensure_ascii=False, indent=2)
 
+    def _open_db(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._read_db()
+
+    def _read_db(self) -> None:
+        rows = self._db.execute("SELECT jp, zh, note FROM terms ORDER BY id")
+        self._records = [{"jp": jp, "zh": zh, "note": note} for jp, zh, note in rows]
+
+    def _persist(self, i: int) -> None:
+        """
+        把第 i 条记录写入存储：JSON 整体重写；SQLite 按 jp（唯一索引）插入或更新这一行，按批提交。
+        不依赖行 id，库里的行被手工删改过也不会写错行。
+        """
+        if self._db is None:
+            self._save()
+            return
+        r = self._records[i]
+        self._db.execute(
+            "INSERT INTO terms (jp, zh, note) VALUES (?, ?, ?)"
+            " ON CONFLICT (jp) DO UPDATE SET zh = excluded.zh, note = excluded.note",
+            (r["jp"], r["zh"], r["note"]),
+        )
+        self._pending += 1
+        if self._pending >= SQLITE_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        """提交 SQLite 后端尚未提交的 upsert（JSON 后端每次 upsert 已写盘，无需调用）。"""
+        if self._db is not None and self._pending:
+            self._db.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+
+    def import_json(self, json_path: str | Path) -> int:
+        """
+        用 {"terms": [...]} JSON 文件的内容整体替换当前术语，返回条数。
+        SQLite 后端的 jp 唯一，JSON 里重复的 jp 只保留第一条（即 upsert 会更新的那条）。
+        """
+        with open(json_path, "r", encoding="utf-8") as f:
+            terms = json.load(f).get("terms", [])
+        self._records = [
+            dict(zip(("jp", "zh", "note"), _fields(r))) for r in terms if isinstance(r, dict)
+        ]
+        if self._db is None:
+            self._save()
+        else:
+            with self._db:
+                self._db.execute("DELETE FROM terms")
+                self._db.executemany(
+                    "INSERT INTO terms (jp, zh, note) VALUES (?, ?, ?) ON CONFLICT (jp) DO NOTHING",
+                    ((r["jp"], r["zh"], r["note"]) for r in self._records),
+                )
+            self._pending = 0
+            self._read_db()
+        self._build_index()
+        return len(self._records)
+
+    def export_json(self, json_path: str | Path) -> int:
+        """把当前术语导出为 {"terms": [...]} JSON 文件，返回条数。"""
+        json_path = Path(json_path)
+        json_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"terms": self._records}, f, ensure_ascii=False, indent=2)
+        return len(self._records)
+
     def search(self, query: str) -> dict[str, Any]:
         """
         检索术语：按日文或备注模糊匹配。
         query 可以是片段日文或中文，返回包含该关键词的条目。
         """
         query = (query or "").strip()
-        hits = []
         if not query:
             return {"hits": []}
         q_lower = query.lower()
-        for r in self._records:
-            jp = (r.get("jp") or "").strip()
-            zh = (r.get("zh") or "").strip()
-            note = (r.get("note") or "").strip()
-            if (
-                q_lower in jp.lower()
-                or q_lower in zh.lower()
-                or q_lower in note.lower()
-                or (query in jp or query in zh)
-            ):
+        if len(query) < 2 or len(q_lower) < 2:
+            # 单字查询没有 bigram 可用，直接逐条比对
+            candidates = range(len(self._records))
+        else:
+            # 子串必然包含其全部 bigram：按小写与原样两种匹配方式分别求交集，再逐条确认
+            candidates = sorted(self._candidates(q_lower) | self._candidates(query))
+        hits = []
+        for i in candidates:
+            jp, zh, note = _fields(self._records[i])
+            if _matches(query, q_lower, jp, zh, note):
                 hits.append({"jp": jp, "zh": zh, "note": note})
         return {"hits": hits}
 
@@ -80,6 +257,39 @@ class MemoriStore:
                         hits.append(h)
         return {"hits": hits}
 
+    def matcher(self) -> GlossaryMatcher:
+        """所有 jp 术语编译成的匹配器（按需构建并缓存）。"""
+        if self._matcher is None:
+            self._matcher = GlossaryMatcher(_fields(r)[0] for r in self._records)
+        return self._matcher
+
+    def match_texts(self, texts: list[str]) -> list[tuple[int, int, dict[str, str]]]:
+        """
+        在每条原文中找出出现的 jp 术语（整句匹配，不按空格切分），
+        返回 [(原文下标, 起始下标, {jp, zh, note}), ...]。同一 jp 有多条记录时各出一项。
+        """
+        by_jp: dict[str, list[dict[str, str]]] = {}
+        for r in self._records:
+            jp, zh, note = _fields(r)
+            if jp:
+                by_jp.setdefault(jp, []).append({"jp": jp, "zh": zh, "note": note})
+        return [
+            (n, start, dict(hit))
+            for n, start, term in self.matcher().find_all(texts)
+            for hit in by_jp[term]
+        ]
+
+    def glossary_for_texts(self, texts: list[str]) -> dict[str, Any]:
+        """一批原文中出现的术语，按首次出现的位置排序并去重（用于注入 prompt）。"""
+        seen: set[tuple[str, str, str]] = set()
+        hits: list[dict[str, str]] = []
+        for _, _, h in self.match_texts(texts):
+            key = (h["jp"], h["zh"], h["note"])
+            if key not in seen:
+                seen.add(key)
+                hits.append(h)
+        return {"hits": hits}
+
     def upsert(self, jp: str, zh: str, note: str = "") -> str:
         """写入或更新一条术语；若 jp 已存在则更新，否则追加。返回 "ok"。"""
         jp = (jp or "").strip()
@@ -87,12 +297,41 @@ class MemoriStore:
         note = (note or "").strip()
         if not jp:
             return "ok"
-        for r in self._records:
-            if (r.get("jp") or "").strip() == jp:
-                r["zh"] = zh
-                r["note"] = note
-                self._save()
-                return "ok"
+        i = self._by_jp.get(jp)
+        if i is not None:
+            r = self._records[i]
+            self._index_remove(i, r)
+            r["zh"] = zh
+            r["note"] = note
+            self._index_add(i, r)
+            self._persist(i)
+            return "ok"
+        i = len(self._records)
         self._records.append({"jp": jp, "zh": zh, "note": note})
-        self._save()
+        self._by_jp[jp] = i
+        self._index_add(i, self._records[i])
+        self._persist(i)
+        self._matcher = None
         return "ok"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Memori 术语库 JSON 与 SQLite 互转")
+    parser.add_argument("action", choices=["import", "export"], help="import: JSON → 库；export: 库 → JSON")
+    parser.add_argument("src", help="import 时为 JSON 文件，export 时为术语库（.sqlite/.db 或 .json）")
+    parser.add_argument("dst", help="import 时为术语库，export 时为 JSON 文件")
+    args = parser.parse_args()
+
+    if args.action == "import":
+        with MemoriStore(args.dst) as store:
+            count = store.import_json(args.src)
+    else:
+        with MemoriStore(args.src) as store:
+            count = store.export_json(args.dst)
+    print(f"{args.action}: {args.src} → {args.dst}，共 {count} 条")
+
+
+if __name__ == "__main__":
+    main()
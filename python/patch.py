@@ -1,11 +1,17 @@
-import importlib.util
+import bisect
+import hashlib
 import json
+import os
 import shutil
 import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Any
 
 import click
+import numpy as np
 import sys
 SCRIPT_DIR = Path(__file__).resolve().parent.parent
 PYTHON_DIR = Path(__file__).resolve().parent
@@ -14,8 +20,18 @@ if str(SCRIPT_DIR) not in sys.path:
 if str(PYTHON_DIR) not in sys.path:
     sys.path.insert(0, str(PYTHON_DIR))
 
+from font_render import font_8x8 as font8, font_8x16 as font16
+from binpatch import decode_patch, encode_patch, is_binary_patch
+from build_manifest import BuildManifest, entry_digest, manifest_path_for
+from glyph_cache import GlyphCache, file_sha256, glyph_namespace
+from rom_image import RomImage, open_rom
+from translation_journal import TranslationJournal
+from write_plan import DEFAULT_MERGE_GAP, WritePlan
+
 TRANSLATIONS_FILE_PATH = SCRIPT_DIR / "translate" / "translations.json"
 PREPATCH_FILE_PATH = PYTHON_DIR / "prepatch.json"
+GLYPH_CACHE_PATH = PYTHON_DIR / ".cache" / "glyphs.sqlite"
+PREPATCH_CACHE_DIR = PYTHON_DIR / ".cache" / "prepatch"
 LAST_MAPPING_OFFSET_8x16 = 0xE5B0
 LAST_MAPPING_OFFSET_8x8 = 0x97bd
 LAST_FONT_OFFSET_8x16 = 0x300
@@ -33,58 +49,171 @@ ENTRY_8x16_COUNT = 0x004EAB04
 BYTES_PER_CHAR_8x8 = 0x20
 BYTES_PER_CHAR_8x16 = 0x40
 
-
-def _load_font_module(name: str, filename: str):
-  spec = importlib.util.spec_from_file_location(name, PYTHON_DIR / "debug" / filename)
-  mod = importlib.util.module_from_spec(spec)
-  spec.loader.exec_module(mod)
-  return mod
+# 各扩展区域的上界（不含）：字模/mapping 表向后增长，不能越过紧随其后的下一块数据。
+# 8x8 mapping 表之后没有已知数据，以 ROM 末尾为界；mapping_key 为 u16，也限制了槽位数。
+END_FONT_8x8 = ENTRY_8x16_COUNT
+END_MAPPING_8x16 = ENTRY_FONT_8x16
+END_FONT_8x16 = ENTRY_8x8_COUNT
+MAX_MAPPING_KEY = 0xFFFF
 
 
-def _render_8x8(chars: list[str], font_path_8x8: str | Path) -> bytes:
-  mod = _load_font_module("font_8x8", "8x8_font.py")
+@lru_cache(maxsize=None)
+def _open_face(font_path: str, mtime_ns: int):
+  """每个进程对同一字体文件只打开一次 Face（文件修改后重新打开）。"""
   import freetype
-  face = freetype.Face(str(font_path_8x8))
-  out = bytearray()
-  for ch in chars:
-    px, w, h = mod.ft_render_mono(face, ch, px_size=8)
-    tile = mod.px_to_tile_8x8(px, w, h)
-    out += mod.tile01_to_gba4bpp(tile)
-  return bytes(out)
+  return freetype.Face(font_path)
+
+
+def _face(font_path: str | Path):
+  font_path = str(font_path)
+  return _open_face(font_path, os.stat(font_path).st_mtime_ns)
+
+
+def _draw_8x8(chars: list[str], font_path_8x8: str | Path) -> bytes:
+  """渲染一组 8x8 字模，按 chars 顺序返回拼接好的 4bpp 数据。"""
+  face = _face(font_path_8x8)
+  tiles = np.zeros((len(chars), 8, 8), dtype=np.uint8)
+  for i, ch in enumerate(chars):
+    tiles[i] = font8.blit_center_np(font8.ft_render_mono_np(face, ch, px_size=8), 8, 8)
+  return font8.tiles01_to_gba4bpp_np(tiles, font8.INK, font8.BG)
+
+
+def _draw_8x16(chars: list[str], font_path_8x16: str | Path, scale_8x16_mode: str) -> bytes:
+  """
+  渲染一组 8x16 字模，按 chars 顺序返回拼接好的 4bpp 数据。
+  逐字只做 FreeType 渲染与居中贴图，缩放/填充/压缩与 4bpp 打包对整叠 (N, H, W) 一次完成。
+  """
+  face = _face(font_path_8x16)
+  if scale_8x16_mode in ("scale", "pad"):
+    grids = np.zeros((len(chars), 12, 8), dtype=np.uint8)
+    for i, ch in enumerate(chars):
+      grids[i] = font16.blit_center_np(font16.ft_render_mono_np(face, ch, cell_size=(8, 12)), 8, 12)
+    glyphs = font16.scale_8x12_to_8x16_np(grids) if scale_8x16_mode == "scale" else font16.pad_8x12_to_8x16_np(grids)
+  else:
+    canvases = np.zeros((len(chars), 16, 16), dtype=np.uint8)
+    for i, ch in enumerate(chars):
+      canvases[i] = font16.blit_center_np(font16.ft_render_mono_np(face, ch, px_size=16), 16, 16)
+    glyphs = font16.compress_16w_to_8w_np(canvases, mode="or")
+  return font16.glyphs8x16_to_gba4bpp_np(glyphs, font16.INK, font16.BG)
+
+
+def _draw_in_pool(draw, chars: list[str], workers: int) -> bytes:
+  """
+  workers > 1 时把 chars 按顺序切成 workers 段，在进程池中各自渲染（每个进程只打开一次 Face），
+  再按原顺序拼接，保证 tile 位置与串行渲染一致。
+  """
+  if workers <= 1 or len(chars) < 2 * workers:
+    return draw(chars)
+  size = -(-len(chars) // workers)
+  chunks = [chars[i : i + size] for i in range(0, len(chars), size)]
+  with ProcessPoolExecutor(max_workers=workers) as pool:
+    return b"".join(pool.map(draw, chunks))
+
+
+def _render_cached(
+  chars: list[str],
+  cache: GlyphCache | None,
+  namespace: str,
+  tile_size: int,
+  draw,
+) -> bytes:
+  """命中缓存的字直接取 tile，只把未命中的字交给 draw 渲染并写回缓存，按 chars 顺序拼接。"""
+  if not chars:
+    return b""
+  if cache is None:
+    return draw(chars)
+  tiles = cache.get_many(namespace, chars)
+  missing = [ch for ch in dict.fromkeys(chars) if ch not in tiles]
+  if missing:
+    data = draw(missing)
+    fresh = {ch: data[i * tile_size : (i + 1) * tile_size] for i, ch in enumerate(missing)}
+    cache.put_many(namespace, fresh)
+    tiles.update(fresh)
+  return b"".join(tiles[ch] for ch in chars)
+
+
+def _namespace_8x8(font_path_8x8: str | Path) -> str:
+  return glyph_namespace(font_path_8x8, "8x8", 8, "none", font8.INK, font8.BG)
+
+
+def _namespace_8x16(font_path_8x16: str | Path, scale_8x16_mode: str) -> str:
+  px_size = 12 if scale_8x16_mode in ("scale", "pad") else 16
+  return glyph_namespace(font_path_8x16, "8x16", px_size, scale_8x16_mode, font16.INK, font16.BG)
+
+
+def _render_8x8(
+  chars: list[str],
+  font_path_8x8: str | Path,
+  cache: GlyphCache | None = None,
+  workers: int = 1,
+) -> bytes:
+  """渲染 8x8 字模。cache 不为空时只渲染缓存未命中的字；workers > 1 时多进程渲染。"""
+  draw = partial(_draw_in_pool, partial(_draw_8x8, font_path_8x8=font_path_8x8), workers=workers)
+  namespace = _namespace_8x8(font_path_8x8) if cache is not None else ""
+  return _render_cached(chars, cache, namespace, BYTES_PER_CHAR_8x8, draw)
 
 
 def _render_8x16(
   chars: list[str],
   font_path_8x16: str | Path,
   scale_8x16_mode: str = "none",
+  cache: GlyphCache | None = None,
+  workers: int = 1,
 ) -> bytes:
   """
   渲染 8x16 字模。scale_8x16_mode: "none" 直接 16px；"scale" 用 12px 渲染再缩放到 8x16；"pad" 用 12px 渲染再填充到 8x16。
+  cache 不为空时只渲染缓存未命中的字；workers > 1 时多进程渲染。
   """
-  mod = _load_font_module("font_8x16", "8x16_font.py")
-  import freetype
-  face = freetype.Face(str(font_path_8x16))
-  out = bytearray()
-  use_8x12 = scale_8x16_mode in ("scale", "pad")
-  for ch in chars:
-    if use_8x12:
-      px, w, h = mod.ft_render_mono(face, ch, cell_size=(8, 12))
-      g8x12 = mod.blit_center(px, w, h, 8, 12)
-      g8x16 = mod.scale_8x12_to_8x16(g8x12) if scale_8x16_mode == "scale" else mod.pad_8x12_to_8x16(g8x12)
-    else:
-      px, w, h = mod.ft_render_mono(face, ch, px_size=16)
-      canvas16 = mod.blit_center(px, w, h, 16, 16)
-      g8x16 = mod.compress_16w_to_8w(canvas16, mode="or")
-    out += mod.glyph8x16_to_gba4bpp(g8x16)
-  return bytes(out)
+  draw = partial(
+    _draw_in_pool,
+    partial(_draw_8x16, font_path_8x16=font_path_8x16, scale_8x16_mode=scale_8x16_mode),
+    workers=workers,
+  )
+  namespace = _namespace_8x16(font_path_8x16, scale_8x16_mode) if cache is not None else ""
+  return _render_cached(chars, cache, namespace, BYTES_PER_CHAR_8x16, draw)
+
+
+def slot_capacities(rom_size: int) -> dict[str, int]:
+  """各区域最多能容纳的字符槽位数 {名称: 槽位数}，rom_size 为 ROM 字节数。"""
+  return {
+    "8x8 字模": (END_FONT_8x8 - ENTRY_FONT_8x8) // BYTES_PER_CHAR_8x8,
+    "8x16 字模": (END_FONT_8x16 - ENTRY_FONT_8x16) // BYTES_PER_CHAR_8x16,
+    "8x8 mapping 表": (rom_size - ENTRY_MAPPING_8x8) // 4,
+    "8x16 mapping 表": (END_MAPPING_8x16 - ENTRY_MAPPING_8x16) // 4,
+    "mapping_key": MAX_MAPPING_KEY - LAST_MAPPING_OFFSET_8x16 + 1,
+  }
+
+
+def slot_capacity(rom_size: int) -> int:
+  """ROM 中最多能放下的字符槽位数（各区域容量的最小值）。"""
+  return min(slot_capacities(rom_size).values())
+
+
+def check_slot_capacity(slot_count: int, rom_size: int) -> None:
+  """slot_count 个槽位放不进任一区域时抛 ValueError，列出超出的区域。"""
+  over = [f"{name}（最多 {cap} 槽）" for name, cap in slot_capacities(rom_size).items() if slot_count > cap]
+  if over:
+    raise ValueError(f"字符槽位数 {slot_count} 超出 ROM 区域容量: {'，'.join(over)}")
+
+
+def _pack_mapping_table(keys: np.ndarray, vals: np.ndarray) -> bytes:
+  """把 [u16 key, u16 val] 表一次性打包为小端字节串。"""
+  table = np.empty((len(keys), 2), dtype="<u2")
+  table[:, 0] = keys & 0xFFFF
+  table[:, 1] = vals & 0xFFFF
+  return table.tobytes()
 
 
 def inject_fonts(
-    rom_path: str | Path,
+    rom: RomImage | str | Path,
     chars: list[str],
     font_path_8x8: str | Path,
     font_path_8x16: str | Path,
     scale_8x16_mode: str = "none",
+    timings: dict[str, float] | None = None,
+    glyph_cache: GlyphCache | None = None,
+    render_workers: int = 1,
+    start: int = 0,
 ) -> dict[str, dict[str, Any]]:
   """
   根据计算出的位置向 ROM 注入 8x8/8x16 字模及 mapping，并返回字符→位置信息的 dict 供后续 ROM 文本使用。
@@ -92,9 +221,19 @@ def inject_fonts(
   - 用 font_path_8x8 / font_path_8x16 渲染出字模，从 8x8font_entry / 8x16font_entry 注入；
   - scale_8x16_mode: "none" | "scale" | "pad"，为 "scale"/"pad" 时 8x16 由 8x12 提取再缩放/填充到 8x16；
   - 从 ENTRY_MAPPING_8x8 / ENTRY_MAPPING_8x16 注入 [u16 key, u16 val] 小端序；
+  - 每个区域（8x8 字模、8x16 字模、两张 mapping 表）各拼成一整块连续缓冲，一次写入；
+  - timings: 可选，传入 dict 时按区域记录耗时（秒），供 CLI 输出；
+  - glyph_cache: 可选，字模缓存，只渲染未命中的字；
+  - render_workers: 渲染进程数，> 1 时按顺序分段多进程渲染，tile 顺序与 mapping 不变；
+  - start: 增量重建用，前 start 个字的字模与 mapping 槽位已在 ROM 中，只渲染并写入之后的部分；
+  - 槽位数超出任一区域容量（见 slot_capacities）时，在渲染与写入前抛 ValueError；
   - 返回 { char: { 'mapping_key', '8x16', '8x8', '8x8font_entry', '8x16font_entry' } }。
   """
   n = len(chars)
+  with open_rom(rom) as image:
+    check_slot_capacity(n, len(image))
+  if timings is None:
+    timings = {}
   # 1) 计算位置 dict（与原先 compute_mapping_offset 一致）
   mapping: dict[str, dict[str, Any]] = {}
   for i, char in enumerate(chars):
@@ -106,72 +245,162 @@ def inject_fonts(
       "8x16font_entry": ENTRY_FONT_8x16 + (i * BYTES_PER_CHAR_8x16),
     }
 
-  # 2) 用 8x8/8x16 字体渲染字模
-  data_8x8 = _render_8x8(chars, font_path_8x8)
-  data_8x16 = _render_8x16(chars, font_path_8x16, scale_8x16_mode=scale_8x16_mode)
-
-  rom_path = Path(rom_path)
-  with open(rom_path, "r+b") as f:
-    # 3) 注入 8x8 字模：从 8x8font_entry 起每字 0x20 字节
-    for i in range(n):
-      off = ENTRY_FONT_8x8 + i * BYTES_PER_CHAR_8x8
-      f.seek(off)
-      f.write(data_8x8[i * BYTES_PER_CHAR_8x8 : (i + 1) * BYTES_PER_CHAR_8x8])
-
-    # 4) 注入 8x16 字模：从 8x16font_entry 起每字 0x40 字节
-    for i in range(n):
-      off = ENTRY_FONT_8x16 + i * BYTES_PER_CHAR_8x16
-      f.seek(off)
-      f.write(data_8x16[i * BYTES_PER_CHAR_8x16 : (i + 1) * BYTES_PER_CHAR_8x16])
-
-    # 5) 注入 mapping：key = mapping_key（小端 u16），val 分别为 8x16/8x8 的 font offset
-    for i in range(n):
-      mapping_key = LAST_MAPPING_OFFSET_8x16 + i
-      val_8x16 = LAST_FONT_OFFSET_8x16 + i
-      val_8x8 = LAST_FONT_OFFSET_8x8 + i
-
-      f.seek(ENTRY_MAPPING_8x16 + i * 4)
-      f.write(struct.pack("<HH", mapping_key & 0xFFFF, val_8x16 & 0xFFFF))
-      f.seek(ENTRY_MAPPING_8x8 + i * 4)
-      f.write(struct.pack("<HH", mapping_key & 0xFFFF, val_8x8 & 0xFFFF))
-
-    # 6) 写入 8x8/8x16 字符数：LAST_*_COUNT + 写入字符数，u32 小端序
-    f.seek(ENTRY_8x8_COUNT)
-    f.write(struct.pack("<I", (LAST_8x8_COUNT + n) & 0xFFFFFFFF))
-    f.seek(ENTRY_8x16_COUNT)
-    f.write(struct.pack("<I", (LAST_8x16_COUNT + n) & 0xFFFFFFFF))
+  # 2) 用 8x8/8x16 字体渲染字模（按 chars 顺序拼接，即为各自区域的连续内容）
+  fresh = chars[start:]
+  t = time.perf_counter()
+  data_8x8 = _render_8x8(fresh, font_path_8x8, cache=glyph_cache, workers=render_workers)
+  timings["render_8x8"] = time.perf_counter() - t
+  t = time.perf_counter()
+  data_8x16 = _render_8x16(
+    fresh, font_path_8x16, scale_8x16_mode=scale_8x16_mode, cache=glyph_cache, workers=render_workers
+  )
+  timings["render_8x16"] = time.perf_counter() - t
+
+  # 3) mapping：key = mapping_key，val 分别为 8x16/8x8 的 font offset
+  t = time.perf_counter()
+  index = np.arange(start, n, dtype=np.int64)
+  keys = LAST_MAPPING_OFFSET_8x16 + index
+  table_8x16 = _pack_mapping_table(keys, LAST_FONT_OFFSET_8x16 + index)
+  table_8x8 = _pack_mapping_table(keys, LAST_FONT_OFFSET_8x8 + index)
+  timings["pack_mapping"] = time.perf_counter() - t
+
+  with open_rom(rom, writable=True) as image:
+    # 4) 注入 8x8 字模：从 ENTRY_FONT_8x8 起每字 0x20 字节，整块写入
+    t = time.perf_counter()
+    image.write(ENTRY_FONT_8x8 + start * BYTES_PER_CHAR_8x8, data_8x8)
+    timings["write_8x8"] = time.perf_counter() - t
+
+    # 5) 注入 8x16 字模：从 ENTRY_FONT_8x16 起每字 0x40 字节，整块写入
+    t = time.perf_counter()
+    image.write(ENTRY_FONT_8x16 + start * BYTES_PER_CHAR_8x16, data_8x16)
+    timings["write_8x16"] = time.perf_counter() - t
+
+    # 6) 注入两张 mapping 表及 8x8/8x16 字符数（LAST_*_COUNT + 写入字符数，u32 小端序）
+    t = time.perf_counter()
+    image.write(ENTRY_MAPPING_8x16 + start * 4, table_8x16)
+    image.write(ENTRY_MAPPING_8x8 + start * 4, table_8x8)
+    image.put_u32le(ENTRY_8x8_COUNT, LAST_8x8_COUNT + n)
+    image.put_u32le(ENTRY_8x16_COUNT, LAST_8x16_COUNT + n)
+    timings["write_mapping"] = time.perf_counter() - t
 
   return mapping
 
 def load_translations():
+  """读 translations.json，并重放翻译脚本尚未合并的追加日志（translations.json.log）。"""
   with open(TRANSLATIONS_FILE_PATH, 'rb') as f:
     data = json.load(f)
-  return data
+  return TranslationJournal(TRANSLATIONS_FILE_PATH).replay(data)
 
 
-def apply_prepatch(rom_path: str | Path, prepatch_path: str | Path | None = None) -> int:
+def _parse_prepatch_json(raw: bytes) -> list[tuple[int, bytes]]:
+  patches = json.loads(raw.decode("utf-8"))
+  spans = []
+  for item in patches or []:
+    pos = item["pos"]
+    offset = int(pos, 16) if isinstance(pos, str) else int(pos)
+    data = (np.asarray(item["bytes"], dtype=np.int64) & 0xFF).astype(np.uint8)
+    spans.append((offset, data.tobytes()))
+  return spans
+
+
+def load_prepatch(prepatch_path: str | Path | None = None) -> list[tuple[int, bytes]]:
   """
-  从 prepatch.json 读取差异列表（与 differ.py 输出格式一致：pos + bytes），
-  按顺序写入 ROM 对应位置。若 prepatch_path 未指定则使用默认 PREPATCH_FILE_PATH。
-  返回写入的 patch 条数；若文件不存在则返回 0。
+  读取 prepatch，返回按 offset 升序的 [(offset, data), ...]。支持两种格式：
+  - JSON：与 differ.py 输出格式一致的 pos + bytes 列表。首次读取后编译为二进制补丁，
+    按 JSON 内容的 sha256 缓存在 PREPATCH_CACHE_DIR，内容不变时直接读缓存；
+  - 二进制补丁：binpatch.py 定义的格式（differ.py --bin 输出），按文件头 magic 识别。
+  prepatch 自身的条目互相重叠时与逐条按文件顺序写入的结果一致（后者覆盖前者），编译时打印提示。
+  若 prepatch_path 未指定则使用默认 PREPATCH_FILE_PATH；文件不存在时返回空列表。
   """
   path = Path(prepatch_path or PREPATCH_FILE_PATH)
   if not path.exists():
+    return []
+  raw = path.read_bytes()
+  if is_binary_patch(raw):
+    return decode_patch(raw)
+  cache_path = PREPATCH_CACHE_DIR / f"{hashlib.sha256(raw).hexdigest()}.bin"
+  if cache_path.exists():
+    return decode_patch(cache_path.read_bytes())
+  plan = WritePlan.layered(_parse_prepatch_json(raw))
+  for (a, a_len), (b, b_len) in plan.shadowed:
+    click.echo(f"  注意：prepatch 0x{b:X} (+{b_len}) 覆盖了之前的 0x{a:X} (+{a_len})，以后者为准")
+  spans = plan.spans
+  cache_path.parent.mkdir(parents=True, exist_ok=True)
+  tmp = cache_path.with_suffix(".tmp")
+  tmp.write_bytes(encode_patch(spans, compress=False))
+  tmp.replace(cache_path)
+  return spans
+
+
+def apply_prepatch(
+    rom: RomImage | str | Path,
+    prepatch_path: str | Path | None = None,
+    max_gap: int = DEFAULT_MERGE_GAP,
+) -> int:
+  """
+  把 prepatch 写入 ROM 对应位置，返回 patch 条数；若文件不存在则返回 0。
+  写入前先检查全部条目是否在 ROM 范围内（越界时抛 ValueError，ROM 不会被改动一半），
+  再按写入计划把相邻条目合并成少数几次整块拷贝。
+  """
+  spans = load_prepatch(prepatch_path)
+  if not spans:
     return 0
-  with open(path, "r", encoding="utf-8") as f:
-    patches = json.load(f)
-  if not patches:
-    return 0
-  rom_path = Path(rom_path)
-  with open(rom_path, "r+b") as f:
-    for item in patches:
-      pos = item["pos"]
-      offset = int(pos, 16) if isinstance(pos, str) else int(pos)
-      raw = item["bytes"]
-      data = bytes(b & 0xFF for b in raw)
-      f.seek(offset)
-      f.write(data)
-  return len(patches)
+  with open_rom(rom, writable=True) as image:
+    out_of_range = [(offset, len(data)) for offset, data in spans if offset + len(data) > len(image)]
+    if out_of_range:
+      listed = "，".join(f"0x{offset:X} (+{size})" for offset, size in out_of_range)
+      raise ValueError(f"prepatch 越界（romLen=0x{len(image):X}）: {listed}")
+    WritePlan(spans).apply(image, max_gap)
+  return len(spans)
+
+
+def font_regions(slot_count: int) -> dict[str, tuple[int, int]]:
+  """inject_fonts 写入 slot_count 个字时会覆盖的区域 {名称: [lo, hi)}。"""
+  return {
+    "8x8 字模": (ENTRY_FONT_8x8, ENTRY_FONT_8x8 + slot_count * BYTES_PER_CHAR_8x8),
+    "8x16 字模": (ENTRY_FONT_8x16, ENTRY_FONT_8x16 + slot_count * BYTES_PER_CHAR_8x16),
+    "8x8 mapping 表": (ENTRY_MAPPING_8x8, ENTRY_MAPPING_8x8 + slot_count * 4),
+    "8x16 mapping 表": (ENTRY_MAPPING_8x16, ENTRY_MAPPING_8x16 + slot_count * 4),
+    "8x8 字符数": (ENTRY_8x8_COUNT, ENTRY_8x8_COUNT + 4),
+    "8x16 字符数": (ENTRY_8x16_COUNT, ENTRY_8x16_COUNT + 4),
+  }
+
+
+def prepatch_overlaps(
+    prepatches: list[tuple[int, bytes]],
+    slot_count: int,
+    plan: WritePlan,
+) -> list[str]:
+  """
+  列出会被后续步骤（字模/mapping 注入、译文写回）覆盖的 prepatch 区间，每处一行说明。
+  prepatch 先于这些步骤写入，重叠部分最终以后者为准。
+  """
+  regions = list(font_regions(slot_count).items())
+  offsets = [offset for offset, _ in plan.spans]
+  found = []
+  for p_lo, data in prepatches:
+    p_hi = p_lo + len(data)
+    for name, (lo, hi) in regions:
+      if max(p_lo, lo) < min(p_hi, hi):
+        overlap = min(p_hi, hi) - max(p_lo, lo)
+        found.append(f"prepatch 0x{p_lo:X} (+{len(data)}) 与 {name} [0x{lo:X}, 0x{hi:X}) 重叠 {overlap} 字节")
+    # 译文区间按 offset 有序且互不重叠，只需从 p_lo 之前最近的一条开始看
+    i = max(bisect.bisect_right(offsets, p_lo) - 1, 0)
+    hit = 0
+    while i < len(offsets) and offsets[i] < p_hi:
+      t_lo, t_data = plan.spans[i]
+      if max(p_lo, t_lo) < min(p_hi, t_lo + len(t_data)):
+        hit += 1
+      i += 1
+    if hit:
+      found.append(f"prepatch 0x{p_lo:X} (+{len(data)}) 与 {hit} 条译文的写入区间重叠")
+  return found
+
+
+def prepatch_sha256(prepatch_path: str | Path | None = None) -> str:
+  """prepatch 文件的 sha256，文件不存在时为空串（写入构建清单用）。"""
+  path = Path(prepatch_path or PREPATCH_FILE_PATH)
+  return file_sha256(path) if path.exists() else ""
 
 def take_chars(data: list[dict]):
   fonts = set()
@@ -187,6 +416,67 @@ def take_chars(data: list[dict]):
       fonts.add(char)
   return sorted(fonts)
 
+def load_char_slots(mapping_path: str | Path) -> list[str]:
+  """
+  从上次输出的 font_mapping.json 还原字符槽位顺序（下标 i 即 mapping_key = LAST_MAPPING_OFFSET_8x16 + i）。
+  槽位不连续或 8x8/8x16 与 mapping_key 不对应时抛 ValueError。
+  """
+  with open(mapping_path, "r", encoding="utf-8") as f:
+    mapping = json.load(f)
+  slots = sorted(mapping, key=lambda ch: mapping[ch]["mapping_key"])
+  for i, ch in enumerate(slots):
+    pos = mapping[ch]
+    if (pos["mapping_key"], pos["8x8"], pos["8x16"]) != (
+      LAST_MAPPING_OFFSET_8x16 + i, LAST_FONT_OFFSET_8x8 + i, LAST_FONT_OFFSET_8x16 + i
+    ):
+      raise ValueError(f"{mapping_path} 中的槽位不连续或与 mapping_key 不对应: {ch!r} {pos}")
+  return slots
+
+
+def allocate_char_slots(
+    chars: list[str],
+    previous: list[str] | None = None,
+    compact: bool = False,
+    capacity: int | None = None,
+) -> list[str]:
+  """
+  给 chars 分配字模/mapping 槽位，返回按槽位排列的字符列表（传给 inject_fonts）。
+  - 已在 previous 中的字保持原槽位，新字按 chars 顺序追加在末尾，已有字的 mapping_key 与 tile 位置都不变；
+  - 不再使用的字默认留在原槽位（字模仍在 ROM 中，只是没有文本引用）；
+  - 追加后会超出 capacity 时，新字先放进这些空出的槽位，放不下的才追加（已有字仍不移动）；
+  - compact=True 时先用这些空出的槽位放新字，再把末尾的字挪进剩余空位并截掉尾部，
+    表会变紧凑，但被挪动的字 mapping_key 会变（增量构建随之退回全量）。
+  previous 为空时即 chars 本身（按码位排序）。
+  """
+  if not previous:
+    return list(chars)
+  used = set(chars)
+  known = set(previous)
+  fresh = [ch for ch in chars if ch not in known]
+  slots = list(previous)
+  if not compact and (capacity is None or len(slots) + len(fresh) <= capacity):
+    return slots + fresh
+
+  # 空位从小到大取用
+  holes = [i for i, ch in enumerate(slots) if ch not in used][::-1]
+  for ch in fresh:
+    if holes:
+      slots[holes.pop()] = ch
+    else:
+      slots.append(ch)
+  if not compact:
+    return slots
+  while holes:
+    hole = holes.pop()
+    while slots and slots[-1] not in used:
+      slots.pop()
+    if hole >= len(slots):
+      break
+    slots[hole] = slots.pop()
+  while slots and slots[-1] not in used:
+    slots.pop()
+  return slots
+
 # 全角空格，用于与原文长度对齐时填充
 FULL_WIDTH_SPACE = "　"
 
@@ -215,34 +505,114 @@ def _encode_char_for_rom(ch: str, mapping: dict[str, dict[str, Any]]) -> bytes:
   return ch.encode("shift_jis", errors="replace")[:2].ljust(2, b"\x00")
 
 
-def encode_translation_for_rom(text: str, mapping: dict[str, dict[str, Any]]) -> bytes:
+class RomTextEncoder:
+  """
+  预编译的译文编码器：构建时把 mapping 中每个字展开成一张 {字: 2 字节} 平铺表（空格覆盖为 0x8140），
+  编码整段译文只需逐字查表再 join 一次。未在 mapping 中的字（Shift-JIS 回退）首次遇到时编码并记入表中。
+  一次构建内 patch_translations_to_rom 等步骤共用同一个实例。
+
+  Example:
+    encoder = RomTextEncoder(mapping)
+    raw = encoder.encode("新游戏　")
+  """
+
+  def __init__(self, mapping: dict[str, dict[str, Any]]):
+    self.table: dict[str, bytes] = {
+      ch: (pos["mapping_key"] & 0xFFFF).to_bytes(2, "big") for ch, pos in mapping.items()
+    }
+    self.table[" "] = SPACE_ROM_BYTES
+    self.table[FULL_WIDTH_SPACE] = SPACE_ROM_BYTES
+    self._mapping = mapping
+
+  @classmethod
+  def of(cls, mapping: "dict[str, dict[str, Any]] | RomTextEncoder") -> "RomTextEncoder":
+    """已是编码器则原样返回，否则用 mapping 构建。"""
+    return mapping if isinstance(mapping, cls) else cls(mapping)
+
+  def encode(self, text: str) -> bytes:
+    table = self.table
+    try:
+      return b"".join([table[ch] for ch in text])
+    except KeyError:
+      pass
+    for ch in text:
+      if ch not in table:
+        table[ch] = _encode_char_for_rom(ch, self._mapping)
+    return b"".join([table[ch] for ch in text])
+
+
+def encode_translation_for_rom(text: str, mapping: "dict[str, dict[str, Any]] | RomTextEncoder") -> bytes:
   """将整段译文编码为 ROM 用字节：每字 2 字节，空格 0x8140，其余为 mapping_key 大端序（或 Shift-JIS）。"""
-  out = bytearray()
-  for ch in text:
-    out += _encode_char_for_rom(ch, mapping)
-  return bytes(out)
+  return RomTextEncoder.of(mapping).encode(text)
+
+
+def iter_encoded_translations(data: list[dict], mapping: "dict[str, dict[str, Any]] | RomTextEncoder"):
+  """按 translations.json 顺序逐条产出 (offset, 编码后字节)，跳过 skiped 与空译文。"""
+  encoder = RomTextEncoder.of(mapping)
+  for entry in data:
+    if entry.get("skiped"):
+      continue
+    trans = entry.get("translation", "")
+    if not trans:
+      continue
+    orig = entry.get("original", "")
+    s = translation_to_fixed_length(trans, orig)
+    yield _parse_offset(entry["offset"]), encoder.encode(s)
+
+
+def build_translation_plan(data: list[dict], mapping: "dict[str, dict[str, Any]] | RomTextEncoder") -> WritePlan:
+  """把全部译文编码成按 offset 排序的写入计划；不同条目的写入区间重叠时抛 ValueError。"""
+  return WritePlan(iter_encoded_translations(data, mapping))
 
 
 def patch_translations_to_rom(
-    rom_path: str | Path,
+    rom: RomImage | str | Path,
     data: list[dict],
-    mapping: dict[str, dict[str, Any]],
-) -> None:
-  """根据 translations.json 的 offset，用 mapping 将译文编码后写入 ROM 对应位置。"""
-  rom_path = Path(rom_path)
-  with open(rom_path, "r+b") as f:
-    for entry in data:
-      if entry.get("skiped"):
-        continue
-      trans = entry.get("translation", "")
-      if not trans:
-        continue
-      orig = entry.get("original", "")
-      s = translation_to_fixed_length(trans, orig)
-      offset = _parse_offset(entry["offset"])
-      encoded = encode_translation_for_rom(s, mapping)
-      f.seek(offset)
-      f.write(encoded)
+    mapping: "dict[str, dict[str, Any]] | RomTextEncoder",
+    max_gap: int = DEFAULT_MERGE_GAP,
+) -> WritePlan:
+  """
+  根据 translations.json 的 offset，用 mapping（或已构建的 RomTextEncoder）将译文编码后写入 ROM 对应位置。
+  先生成写入计划，再把间隔不超过 max_gap 的条目合并成大块写入；返回该计划供保存或复用。
+  """
+  plan = build_translation_plan(data, mapping)
+  with open_rom(rom, writable=True) as image:
+    plan.apply(image, max_gap)
+  return plan
+
+
+def patch_translations_incremental(
+    rom: RomImage,
+    base_rom: RomImage | None,
+    prepatches: list[tuple[int, bytes]],
+    plan: WritePlan,
+    previous: dict[int, tuple[int, str]],
+    max_gap: int = DEFAULT_MERGE_GAP,
+) -> tuple[dict[int, tuple[int, str]], int, int]:
+  """
+  增量写回译文：先把上次写过、这次不再有译文的 offset 还原为原版 ROM（叠加 prepatch 后）的字节，
+  再只写入 plan 中与上次构建摘要不同的 offset。
+  previous 为空时（全量构建并记录清单）全部写入，base_rom 可为 None。
+  返回 (本次各 offset 的 [长度, 摘要], 写入条数, 还原条数)。
+  """
+  entries = {offset: (len(raw), entry_digest(raw)) for offset, raw in plan.spans}
+  restored = 0
+  for offset, (size, _) in previous.items():
+    # 不再有译文的整段，或原文变短后多出的尾部
+    keep = entries[offset][0] if offset in entries else 0
+    if keep >= size:
+      continue
+    lo = offset + keep
+    pristine = bytearray(base_rom.read(lo, size - keep))
+    for p_off, p_data in prepatches:
+      a, b = max(lo, p_off), min(offset + size, p_off + len(p_data))
+      if a < b:
+        pristine[a - lo : b - lo] = p_data[a - p_off : b - p_off]
+    rom.write(lo, pristine)
+    restored += 1
+  changed = WritePlan((offset, raw) for offset, raw in plan.spans if previous.get(offset) != entries[offset])
+  changed.apply(rom, max_gap)
+  return entries, len(changed), restored
 
 
 def translation_to_fixed_length(translation: str, original: str) -> str:
@@ -279,7 +649,16 @@ def validate_translations(data: list[dict]):
 @click.option("--out-rom", "-o", type=click.Path(path_type=Path), help="输出到此 ROM 文件，不修改原 ROM")
 @click.option("--out-mapping", "-m", type=click.Path(path_type=Path), help="将返回的字符→位置 dict 写入此 JSON 文件，供后续 ROM 文本使用")
 @click.option("--8x16-scale", "scale_8x16", type=click.Choice(["none", "scale", "pad"], case_sensitive=False), default="none", help="8x16 字模方式：none=直接 16px 渲染；scale=8x12 提取后缩放到 8x16；pad=8x12 提取后填充到 8x16")
-def main(rom_path: Path, font_8x8: Path, font_8x16: Path | None, out_rom: Path | None, out_mapping: Path | None, scale_8x16: str) -> None:
+@click.option("--prepatch", "prepatch_path", type=click.Path(exists=True, path_type=Path), default=None, help="prepatch 文件（JSON 或 differ.py --bin 生成的二进制补丁），默认 python/prepatch.json")
+@click.option("--glyph-cache", "glyph_cache_path", type=click.Path(path_type=Path), default=GLYPH_CACHE_PATH, show_default=True, help="字模缓存文件（SQLite），字体与参数不变时只渲染新增的字")
+@click.option("--no-glyph-cache", is_flag=True, help="不读写字模缓存，全部重新渲染")
+@click.option("--render-workers", type=click.IntRange(min=1), default=1, show_default=True, help="字模渲染进程数，scale/pad 模式下收益最明显")
+@click.option("--slots-from", type=click.Path(exists=True, path_type=Path), help="沿用此 font_mapping.json 的字符槽位（默认读取 -m 指定的已有文件），新字追加在末尾")
+@click.option("--compact-slots", is_flag=True, help="沿用槽位时把不再使用的槽位让给新字并压缩表尾（会改动被挪动字的 mapping_key）")
+@click.option("--merge-gap", type=click.IntRange(min=0), default=DEFAULT_MERGE_GAP, show_default=True, help="译文写入时间隔不超过此字节数的条目合并为一次写入")
+@click.option("--write-plan", "write_plan_path", type=click.Path(path_type=Path), help="将译文写入计划（offset + 编码后字节）保存为 JSON，供其他工具复用")
+@click.option("--incremental", is_flag=True, help="在已有的输出 ROM 上增量重建，只写入变化的字模、映射与译文（需配合 -o，清单为 <out_rom>.manifest.json）")
+def main(rom_path: Path, font_8x8: Path, font_8x16: Path | None, out_rom: Path | None, out_mapping: Path | None, scale_8x16: str, prepatch_path: Path | None, glyph_cache_path: Path, no_glyph_cache: bool, render_workers: int, slots_from: Path | None, compact_slots: bool, merge_gap: int, write_plan_path: Path | None, incremental: bool) -> None:
   """
   校验译文并向 ROM 注入扩展字模与映射，返回字符位置 dict 供后续文本用。
 
@@ -290,11 +669,22 @@ def main(rom_path: Path, font_8x8: Path, font_8x16: Path | None, out_rom: Path |
     out_rom: 可选。指定则输出到此 ROM 文件，不修改原 ROM。
     out_mapping: 可选。将字符→位置 dict 写入的 JSON 路径，供后续 ROM 文本使用。
     scale_8x16: none/scale/pad。scale 或 pad 时 8x16 先用 12px 渲染成 8x12，再缩放或填充到 8x16。
+    prepatch_path: 可选。prepatch 文件路径（JSON 或二进制补丁），默认 PREPATCH_FILE_PATH。
+    glyph_cache_path: 字模缓存路径，按字体 hash/尺寸/缩放方式/码位缓存 4bpp tile。
+    no_glyph_cache: 为 True 时不使用字模缓存。
+    render_workers: 字模渲染进程数，默认 1 为单进程。
+    slots_from: 可选。上次输出的 font_mapping.json；已有字保持原槽位，新字追加，译文改动不会让后续字整体移位。
+    compact_slots: 为 True 时把不再使用的槽位让给新字，并把表尾的字挪进剩余空位。
+      不加此选项时，若追加新字会超出 ROM 区域容量，也会自动把空出的槽位让给新字（已有字不移动）。
+    merge_gap: 译文写入计划中间隔不超过此字节数的条目合并为一次写入（间隔沿用 ROM 原字节）。
+    write_plan_path: 可选。保存译文写入计划的 JSON 路径。
+    incremental: 为 True 时按构建清单增量重建；原版 ROM/prepatch 变化、字符顺序移位或输出 ROM 被改动时自动全量构建。
 
   Example:
     python patch.py rom.gba font.ttf -o patched.gba -m font_mapping.json
     python patch.py rom.gba debug/fusion-pixel-8px-monospaced-zh_hans.ttf debug/MZPXflat.ttf --8x16-scale pad -o patched.gba  -m font_mapping.json
     python patch.py rom.gba font_8x8.ttf font_8x16.ttf --8x16-scale scale -o patched.gba -m font_mapping.json
+    python patch.py rom.gba font_8x8.ttf font_8x16.ttf --8x16-scale pad -o patched.gba --incremental
   """
   font_16 = font_8x16 if font_8x16 is not None else font_8x8
   if font_8x16 is None:
@@ -307,20 +697,101 @@ def main(rom_path: Path, font_8x8: Path, font_8x16: Path | None, out_rom: Path |
   chars = take_chars(data)
   click.echo(f"chars count: {len(chars)}")
 
+  capacity = slot_capacity(rom_path.stat().st_size)
+  if slots_from is None and out_mapping is not None and out_mapping.exists():
+    slots_from = out_mapping
+  if slots_from is not None:
+    previous_slots = load_char_slots(slots_from)
+    slots = allocate_char_slots(chars, previous_slots, compact=compact_slots, capacity=capacity)
+    used = set(chars)
+    reused = not compact_slots and len(previous_slots) + len(set(chars) - set(previous_slots)) > capacity
+    click.echo(
+      f"沿用 {slots_from} 的字符槽位：本次 {len(slots)} 槽，上次 {len(previous_slots)} 槽"
+      f"（{len(slots) - len(previous_slots):+d}），容量 {capacity} 槽；"
+      f"新增 {len(set(slots) - set(previous_slots))} 字，空闲 {sum(ch not in used for ch in slots)} 槽"
+    )
+    if reused:
+      click.echo("  追加新字会超出容量，已把不再使用的槽位让给新字")
+  else:
+    slots = chars
+    click.echo(f"字符槽位：本次 {len(slots)} 槽，容量 {capacity} 槽")
+  # 写入任何内容之前先检查容量，超出时 ROM 保持不变
+  check_slot_capacity(len(slots), rom_path.stat().st_size)
+
   target_rom = out_rom if out_rom else rom_path
-  if out_rom:
+  current: BuildManifest | None = None
+  previous: BuildManifest | None = None
+  if incremental:
+    if not out_rom:
+      raise click.UsageError("--incremental 需要配合 --out-rom 使用")
+    current = BuildManifest(
+      base_rom=file_sha256(rom_path),
+      prepatch=prepatch_sha256(prepatch_path),
+      glyphs={"8x8": _namespace_8x8(font_8x8), "8x16": _namespace_8x16(font_16, scale_8x16)},
+      chars=slots,
+    )
+    previous = BuildManifest.load(manifest_path_for(out_rom))
+    reason = "没有可用的构建清单" if previous is None else previous.full_rebuild_reason(current, out_rom)
+    if reason:
+      click.echo(f"无法增量重建（{reason}），改为全量构建")
+      previous = None
+    else:
+      click.echo(f"增量重建：在 {out_rom} 上只写入变化的字模与译文")
+
+  if out_rom and previous is None:
     shutil.copy2(rom_path, out_rom)
     click.echo(f"已复制 {rom_path} -> {out_rom}")
 
-  n_prepatch = apply_prepatch(target_rom)
-  if n_prepatch:
-    click.echo(f"已从 prepatch.json 应用 {n_prepatch} 处 prepatch 到 {target_rom}")
-
-  mapping = inject_fonts(target_rom, chars, font_8x8, font_16, scale_8x16_mode=scale_8x16)
-  click.echo(f"已向 {target_rom} 注入 {len(chars)} 字 8x8/8x16 字模与映射表")
-
-  patch_translations_to_rom(target_rom, data, mapping)
-  click.echo("已根据 translations.json 的 offset 与 mapping 替换 ROM 内对应文本")
+  # 整个构建流程只映射一次 ROM，各步骤直接写映射内存
+  with RomImage(target_rom, writable=True) as rom:
+    if previous is None:
+      n_prepatch = apply_prepatch(rom, prepatch_path, merge_gap)
+      if n_prepatch:
+        click.echo(f"已从 {prepatch_path or PREPATCH_FILE_PATH} 应用 {n_prepatch} 处 prepatch 到 {target_rom}")
+
+    start = previous.reusable_glyphs(current) if previous is not None else 0
+    timings: dict[str, float] = {}
+    glyph_cache = None if no_glyph_cache else GlyphCache(glyph_cache_path)
+    try:
+      mapping = inject_fonts(
+        rom, slots, font_8x8, font_16,
+        scale_8x16_mode=scale_8x16, timings=timings, glyph_cache=glyph_cache, render_workers=render_workers,
+        start=start,
+      )
+    finally:
+      if glyph_cache is not None:
+        glyph_cache.close()
+    click.echo(f"已向 {target_rom} 注入 {len(slots) - start} 字 8x8/8x16 字模与映射表（保留 {start} 字）")
+    click.echo("  " + "，".join(f"{name} {sec * 1000:.1f}ms" for name, sec in timings.items()))
+    if glyph_cache is not None:
+      click.echo(f"  {glyph_cache.stats_line()}")
+
+    t = time.perf_counter()
+    plan = build_translation_plan(data, RomTextEncoder(mapping))
+    for line in prepatch_overlaps(load_prepatch(prepatch_path), len(slots), plan):
+      click.echo(f"  注意：{line}，以后写入的内容为准")
+    if current is None:
+      writes = plan.apply(rom, merge_gap)
+      click.echo(f"已根据 translations.json 的 offset 与 mapping 替换 ROM 内 {len(plan)} 处文本（合并为 {writes} 次写入）")
+    elif previous is None:
+      current.entries, written, _ = patch_translations_incremental(rom, None, [], plan, {}, merge_gap)
+      click.echo(f"已根据 translations.json 的 offset 与 mapping 替换 ROM 内 {written} 处文本")
+    else:
+      with RomImage(rom_path) as base:
+        current.entries, written, restored = patch_translations_incremental(
+          rom, base, load_prepatch(prepatch_path), plan, previous.entries, merge_gap
+        )
+      click.echo(f"增量写回译文：改写 {written} 处，还原 {restored} 处，未变 {len(current.entries) - written} 处")
+    click.echo(f"  译文编码与写入 {(time.perf_counter() - t) * 1000:.1f}ms")
+
+  if write_plan_path:
+    plan.save(write_plan_path)
+    click.echo(f"译文写入计划已保存到 {write_plan_path}")
+
+  if current is not None:
+    current.output = file_sha256(target_rom)
+    current.save(manifest_path_for(target_rom))
+    click.echo(f"构建清单已写入 {manifest_path_for(target_rom)}")
 
   if out_mapping:
     with open(out_mapping, "w", encoding="utf-8") as f:
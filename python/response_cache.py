@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+模型响应缓存：按请求内容寻址，把 chat.completions 的回复文本存进 SQLite。
+键为 (模型, system instruction 的 sha256, temperature, 其余消息原文, extra_body) 的 sha256，
+同一批原文、同一 instruction 重跑时（崩溃后续跑、--same-only、重试某批）直接返回上次的回复。
+条目超过 TTL 即失效；总大小超过上限时按最近使用时间淘汰。
+
+Example:
+    with ResponseCache(".cache/responses.sqlite") as cache:
+        content = cache.get(request)
+        if content is None:
+            content = call_model(request)
+            cache.put(request, content)
+        print(cache.stats_line())
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+# 请求/回复的组织方式有不兼容改动时递增，旧缓存自然失效
+RESPONSE_CACHE_VERSION = 1
+# 默认有效期（秒）与容量上限（回复文本字节数）
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used ON responses (used);
+"""
+
+
+def request_key(request: dict) -> str:
+    """chat.completions.create 的参数 → 缓存键。system 只取 hash，其余消息按原文参与。"""
+    messages = request.get("messages") or []
+    system = "".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+    raw = {
+        "version": RESPONSE_CACHE_VERSION,
+        "model": request.get("model"),
+        "system": hashlib.sha256(system.encode("utf-8")).hexdigest(),
+        "temperature": request.get("temperature"),
+        "messages": [[m.get("role"), m.get("content")] for m in messages if m.get("role") != "system"],
+        "extra_body": request.get("extra_body"),
+    }
+    payload = json.dumps(raw, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite 响应缓存，记录本次会话的命中/未命中/淘汰数。"""
+
+    def __init__(self, path: str | Path, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def get(self, request: dict) -> str | None:
+        """取出该请求缓存的回复；没有或已过期时返回 None。"""
+        key = request_key(request)
+        row = self._db.execute("SELECT content, created FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or now - row[1] > self.ttl:
+            self.misses += 1
+            return None
+        with self._db:
+            self._db.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, request: dict, content: str) -> None:
+        """写入回复（空回复不缓存），超出容量上限时淘汰。"""
+        if not content:
+            return
+        now = time.time()
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, content, created, used) VALUES (?, ?, ?, ?)",
+                (request_key(request), content, now, now),
+            )
+        self.evict()
+
+    def size_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM responses").fetchone()[0]
+
+    def evict(self) -> int:
+        """先删过期条目，再按 used 从旧到新删除，直到总字节数不超过 max_bytes，返回删除条数。"""
+        with self._db:
+            removed = self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)).rowcount
+        excess = self.size_bytes() - self.max_bytes
+        if excess > 0:
+            with self._db:
+                rows = self._db.execute("SELECT key, LENGTH(CAST(content AS BLOB)) FROM responses ORDER BY used")
+                doomed = []
+                for key, size in rows:
+                    if excess <= 0:
+                        break
+                    doomed.append((key,))
+                    excess -= size
+                self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+                removed += len(doomed)
+        self.evicted += removed
+        return removed
+
+    def stats_line(self) -> str:
+        return f"响应缓存：命中 {self.hits}，未命中 {self.misses}，淘汰 {self.evicted}"
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+ROM 访问层：用 mmap 映射整个 ROM 文件，供 text_dumper / differ / patch 共用。
+读取不复制整块数据（memoryview 切片直接指向映射内存），写入直接落到映射上，
+一次构建流程中 ROM 只映射一次，不再反复 read() / seek() + write()。
+
+Example:
+    with RomImage("patched.gba", writable=True) as rom:
+        count = rom.u32le(0x00616058)
+        rom.write(0x004B4900, tiles)
+        rom.put_u32le(0x00616058, count + 1)
+"""
+
+import mmap
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+_U16LE = struct.Struct("<H")
+_U16BE = struct.Struct(">H")
+_U32LE = struct.Struct("<I")
+_U32BE = struct.Struct(">I")
+
+
+class RomImage:
+    """基于 mmap 的 ROM 映像。writable=True 时以读写方式映射，写入会同步到文件。"""
+
+    def __init__(self, path: str | Path, writable: bool = False):
+        self.path = Path(path)
+        self.writable = writable
+        self._file = open(self.path, "r+b" if writable else "rb")
+        try:
+            if self.path.stat().st_size == 0:
+                # 空文件无法 mmap，用空缓冲代替
+                self._mm = bytearray()
+            else:
+                access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+                self._mm = mmap.mmap(self._file.fileno(), 0, access=access)
+        except Exception:
+            self._file.close()
+            raise
+
+    def __enter__(self) -> "RomImage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._mm)
+
+    @property
+    def buffer(self) -> mmap.mmap | bytearray:
+        """底层映射对象，可直接交给 np.frombuffer 等支持 buffer 协议的接口。"""
+        return self._mm
+
+    def close(self) -> None:
+        """关闭映射与文件。仍持有的 memoryview / np.frombuffer 视图须先释放。"""
+        if isinstance(self._mm, mmap.mmap) and not self._mm.closed:
+            if self.writable:
+                self._mm.flush()
+            self._mm.close()
+        self._file.close()
+
+    def flush(self) -> None:
+        if isinstance(self._mm, mmap.mmap) and self.writable:
+            self._mm.flush()
+
+    def _check(self, offset: int, size: int) -> None:
+        if offset < 0 or size < 0 or offset + size > len(self._mm):
+            raise ValueError(
+                f"ROM 越界: offset=0x{offset:X}, len={size}, romLen=0x{len(self._mm):X}"
+            )
+
+    # --- 读取 ---
+
+    def view(self, start: int = 0, end: int | None = None) -> memoryview:
+        """返回 [start, end) 的只读零拷贝视图（可写映射时可写）。"""
+        end = len(self._mm) if end is None else end
+        self._check(start, end - start)
+        return memoryview(self._mm)[start:end]
+
+    def read(self, offset: int, size: int) -> bytes:
+        self._check(offset, size)
+        return bytes(self._mm[offset : offset + size])
+
+    def u16le(self, offset: int) -> int:
+        self._check(offset, 2)
+        return _U16LE.unpack_from(self._mm, offset)[0]
+
+    def u16be(self, offset: int) -> int:
+        self._check(offset, 2)
+        return _U16BE.unpack_from(self._mm, offset)[0]
+
+    def u32le(self, offset: int) -> int:
+        self._check(offset, 4)
+        return _U32LE.unpack_from(self._mm, offset)[0]
+
+    def u32be(self, offset: int) -> int:
+        self._check(offset, 4)
+        return _U32BE.unpack_from(self._mm, offset)[0]
+
+    # --- 写入 ---
+
+    def write(self, offset: int, data: bytes | bytearray | memoryview) -> None:
+        """把一整段数据写到 offset，越界时抛 ValueError（不会像文件写入那样扩展 ROM）。"""
+        size = len(data)
+        self._check(offset, size)
+        self._mm[offset : offset + size] = data
+
+    def write_spans(self, spans: Iterable[tuple[int, bytes | bytearray | memoryview]]) -> int:
+        """批量写入 [(offset, data), ...]，返回写入的字节总数。"""
+        total = 0
+        for offset, data in spans:
+            self.write(offset, data)
+            total += len(data)
+        return total
+
+    def put_u16le(self, offset: int, value: int) -> None:
+        self._check(offset, 2)
+        _U16LE.pack_into(self._mm, offset, value & 0xFFFF)
+
+    def put_u16be(self, offset: int, value: int) -> None:
+        self._check(offset, 2)
+        _U16BE.pack_into(self._mm, offset, value & 0xFFFF)
+
+    def put_u32le(self, offset: int, value: int) -> None:
+        self._check(offset, 4)
+        _U32LE.pack_into(self._mm, offset, value & 0xFFFFFFFF)
+
+    def put_u32be(self, offset: int, value: int) -> None:
+        self._check(offset, 4)
+        _U32BE.pack_into(self._mm, offset, value & 0xFFFFFFFF)
+
+
+@contextmanager
+def open_rom(rom: "RomImage | str | Path", writable: bool = False) -> Iterator[RomImage]:
+    """传入已打开的 RomImage 时直接复用（不关闭），传入路径时临时映射并在退出时关闭。"""
+    if isinstance(rom, RomImage):
+        yield rom
+        return
+    with RomImage(rom, writable=writable) as image:
+        yield image
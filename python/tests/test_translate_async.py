@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+translate_with_glm 并发模式的测试：本地起一个 OpenAI 兼容的桩服务（http.server，跑在线程里）代替智谱 API，
+按批次依次返回 429（带 Retry-After）、503、直接断开连接、延迟回复，检查重试、限流与写回顺序。
+
+运行：
+  cd python && python -m unittest discover -s tests
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+PYTHON_DIR = Path(__file__).resolve().parent.parent
+if str(PYTHON_DIR) not in sys.path:
+    sys.path.insert(0, str(PYTHON_DIR))
+
+import translate_with_glm as twg  # noqa: E402
+from openai import OpenAI  # noqa: E402
+
+BATCH_SIZE = 10
+ENTRY_COUNT = 200
+# 每批第一次请求的遭遇，按批次下标轮换；第二次起正常回复
+FAULTS = ["429", "503", "drop", "slow", "ok"]
+
+
+def make_entries(count: int = ENTRY_COUNT) -> list[dict]:
+    return [
+        {"offset": f"0x{i:X}", "hex": "", "length": 8, "original": f"テキスト{i:04d}　　"}
+        for i in range(count)
+    ]
+
+
+class StubState:
+    def __init__(self, faults: bool, fail_batch: int | None = None):
+        self.faults = faults
+        self.fail_batch = fail_batch
+        self.lock = threading.Lock()
+        self.attempts: dict[int, int] = {}
+        self.seen: dict[str, int] = {}
+        self.arrivals: list[float] = []
+        self.batch_arrivals: dict[int, list[float]] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict | None = None) -> None:
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self) -> None:
+        state: StubState = self.server.state
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        user = request["messages"][-1]["content"]
+        items = json.loads(user[user.index("[") : user.rindex("]") + 1])
+        batch = int(items[0]["offset"], 16) // BATCH_SIZE
+        with state.lock:
+            state.arrivals.append(time.monotonic())
+            state.batch_arrivals.setdefault(batch, []).append(state.arrivals[-1])
+            attempt = state.attempts[batch] = state.attempts.get(batch, 0) + 1
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            fault = FAULTS[batch % len(FAULTS)] if state.faults and attempt == 1 else "ok"
+            if state.fail_batch == batch:
+                fault = "400"
+            with state.lock:
+                state.seen[fault] = state.seen.get(fault, 0) + 1
+            # 所有回复都随机延迟，让各批完成顺序与发出顺序不同
+            time.sleep(random.uniform(0, 0.03) + (0.15 if fault == "slow" else 0))
+            if fault == "429":
+                self._send_json(429, {"error": {"message": "rate limited"}}, {"Retry-After": "0.05"})
+            elif fault == "503":
+                self._send_json(503, {"error": {"message": "unavailable"}})
+            elif fault == "400":
+                self._send_json(400, {"error": {"message": "bad request"}})
+            elif fault == "drop":
+                self.close_connection = True
+            else:
+                out = [{"offset": x["offset"], "text": "译文" + x["text"][-6:-2], "skiped": False} for x in items]
+                content = json.dumps(out, ensure_ascii=False)
+                self._send_json(
+                    200,
+                    {
+                        "id": f"stub-{batch}-{attempt}",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": request["model"],
+                        "choices": [
+                            {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                        ],
+                        "usage": {"prompt_tokens": len(user), "completion_tokens": len(content), "total_tokens": len(user) + len(content)},
+                    },
+                )
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+
+@contextlib.contextmanager
+def stub_server(state: StubState):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.state = state
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class TranslateAsyncTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        patches = [
+            mock.patch.object(twg, "RETRY_BASE_DELAY", 0.01),
+            mock.patch.object(twg, "RETRY_MAX_DELAY", 0.1),
+            mock.patch.dict(os.environ, {"GLM_API_KEY": "test-key"}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _output(self, name: str) -> Path:
+        path = self.tmp / name / "translations.json"
+        for p in (
+            mock.patch.object(twg, "OUTPUT_DIR", path.parent),
+            mock.patch.object(twg, "TRANSLATIONS_OUTPUT_PATH", path),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+        return path
+
+    def run_sequential(self) -> bytes:
+        path = self._output("sequential")
+        with stub_server(StubState(faults=False)) as url, contextlib.redirect_stdout(io.StringIO()):
+            twg.process_all(OpenAI(api_key="test-key", base_url=url), "stub", "instruction", make_entries(), batch_size=BATCH_SIZE)
+        return path.read_bytes()
+
+    def run_async(self, name: str, state: StubState, **kwargs) -> tuple[Path, list[str]]:
+        path = self._output(name)
+        written: list[str] = []
+        append = twg.append_translations
+
+        def record(entries: list[dict]) -> None:
+            written.extend(e["offset"] for e in entries)
+            append(entries)
+
+        with stub_server(state) as url, mock.patch.dict(os.environ, {"GLM_BASE_URL": url}), mock.patch.object(
+            twg, "append_translations", record
+        ), contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            asyncio.run(
+                twg.process_all_async(
+                    twg.get_async_client(), "stub", "instruction", make_entries(), batch_size=BATCH_SIZE, **kwargs
+                )
+            )
+        return path, written
+
+    def test_output_matches_sequential_run(self) -> None:
+        expected = self.run_sequential()
+        state = StubState(faults=True)
+        path, written = self.run_async("async", state, concurrency=6, max_retries=3)
+
+        self.assertEqual(path.read_bytes(), expected)
+        self.assertFalse(path.with_name(path.name + ".log").exists())
+        # 日志按批次顺序追加，与逐批模式一致
+        self.assertEqual(written, [e["offset"] for e in make_entries()])
+        # 每种故障都遇到过，且每批最多重试一次即成功
+        for fault in ("429", "503", "drop", "slow"):
+            self.assertGreater(state.seen.get(fault, 0), 0, fault)
+        self.assertEqual(max(state.attempts.values()), 2)
+        # 429 之后按 Retry-After（0.05s）等待再重试，而不是立即重发
+        for batch, arrivals in state.batch_arrivals.items():
+            if FAULTS[batch % len(FAULTS)] == "429":
+                self.assertGreaterEqual(arrivals[1] - arrivals[0], 0.05)
+        self.assertEqual(len(state.attempts), ENTRY_COUNT // BATCH_SIZE)
+        self.assertGreater(state.max_in_flight, 1)
+        self.assertLessEqual(state.max_in_flight, 6)
+
+    def test_rpm_limit(self) -> None:
+        rpm, window = 4, 0.3
+        state = StubState(faults=False)
+        with mock.patch.object(twg, "RATE_WINDOW", window):
+            self.run_async("rpm", state, concurrency=8, rpm=rpm)
+        arrivals = sorted(state.arrivals)
+        for i, t in enumerate(arrivals):
+            # 留 20ms 余量给请求从发出到桩服务收到的时间差
+            in_window = [u for u in arrivals[i:] if u - t < window - 0.02]
+            self.assertLessEqual(len(in_window), rpm)
+
+    def test_non_retryable_error_keeps_earlier_batches(self) -> None:
+        state = StubState(faults=False, fail_batch=7)
+        with self.assertRaises(Exception):
+            self.run_async("fail", state, concurrency=4)
+        self.assertEqual(state.attempts[7], 1)
+        rows = json.loads((self.tmp / "fail" / "translations.json").read_text(encoding="utf-8"))
+        done = [bool(r["translation"]) for r in rows]
+        # 写回的是整批组成的连续前缀，且不含失败批及其之后的批次（其余请求已取消）
+        self.assertEqual(done, sorted(done, reverse=True))
+        self.assertEqual(sum(done) % BATCH_SIZE, 0)
+        self.assertLessEqual(sum(done), 7 * BATCH_SIZE)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_rpm_and_tpm(self) -> None:
+        async def acquire_times(limiter: twg.RateLimiter, tokens: int, count: int) -> list[float]:
+            start = time.monotonic()
+            times = []
+            for _ in range(count):
+                await limiter.acquire(tokens)
+                times.append(time.monotonic() - start)
+            return times
+
+        with mock.patch.object(twg, "RATE_WINDOW", 0.2):
+            times = asyncio.run(acquire_times(twg.RateLimiter(rpm=3), 1, 7))
+            self.assertEqual([round(t / 0.2) for t in times], [0, 0, 0, 1, 1, 1, 2])
+            times = asyncio.run(acquire_times(twg.RateLimiter(tpm=100), 60, 3))
+            self.assertEqual([round(t / 0.2) for t in times], [0, 1, 2])
+            # 单个请求超过 tpm 时窗口清空即放行
+            times = asyncio.run(acquire_times(twg.RateLimiter(tpm=10), 50, 2))
+            self.assertEqual([round(t / 0.2) for t in times], [0, 1])
+
+    def test_settle_uses_actual_usage(self) -> None:
+        async def run() -> float:
+            limiter = twg.RateLimiter(tpm=100)
+            event = await limiter.acquire(90)
+            limiter.settle(event, 10)
+            start = time.monotonic()
+            await limiter.acquire(80)
+            return time.monotonic() - start
+
+        with mock.patch.object(twg, "RATE_WINDOW", 0.2):
+            self.assertLess(asyncio.run(run()), 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,16 +19,25 @@
   python translate_with_glm.py --skiped-only              # 仅对已标记为跳过的条目重新翻译，无需 skip 则覆盖原记录
   python translate_with_glm.py --same-only                # 仅对 skip=false 且原文与译文相同的条目重新翻译
   python translate_with_glm.py --model glm-4-plus --files text_chunk_001.json
+  python translate_with_glm.py --memori                   # 把本批原文中出现的术语附在请求里（默认 translate/memori.json）
+  python translate_with_glm.py --memori ../translate/memori.sqlite   # 指定其他术语库
+  python translate_with_glm.py --concurrency 8 --rpm 60 --tpm 200000  # 异步并发请求，按每分钟请求数/token 数限流
+  python translate_with_glm.py --no-cache                 # 不读写响应缓存（默认 python/.cache/responses.sqlite）
+  python translate_with_glm.py --no-dedup                 # 相同原文（忽略尾部全角空格）也逐条请求
 """
 
+import asyncio
 import json
 import os
+import random
 import re
 import sys
+import time
+from collections import deque
 from pathlib import Path
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, OpenAI
 
 # 项目内 instruction 路径
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -41,10 +50,16 @@ PROJECT_ROOT = SCRIPT_DIR.parent
 load_dotenv(PROJECT_ROOT / ".env")
 load_dotenv(SCRIPT_DIR / ".env")
 
+from memori_store import MemoriStore  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+from translation_journal import TranslationJournal  # noqa: E402
+
 TEXT_DUMP_DIR = SCRIPT_DIR / "debug" / "text_dump"
 OUTPUT_DIR = PROJECT_ROOT / "translate"  # 翻译结果保存到此目录，不写回源文件
-TRANSLATIONS_OUTPUT_PATH = OUTPUT_DIR / "translations.json"  # 唯一输出文件，每条翻译后追加保存
+TRANSLATIONS_OUTPUT_PATH = OUTPUT_DIR / "translations.json"  # 唯一输出文件；每批追加到 translations.json.log，运行结束时合并
 INSTRUCTION_PATH = SCRIPT_DIR / "translate.instruction.md"
+RESPONSE_CACHE_PATH = SCRIPT_DIR / ".cache" / "responses.sqlite"  # 相同请求重跑时直接复用上次的回复
+MEMORI_PATH = OUTPUT_DIR / "memori.json"  # 只写 --memori 时使用的术语库，把本批原文命中的术语附在请求里
 
 # 默认使用智谱 OpenAI 兼容 API（GLM-4 系列），配置从 .env 读取
 DEFAULT_BASE_URL = "https://open.bigmodel.cn/api/paas/v4"
@@ -56,8 +71,15 @@ MAX_HISTORY_TURNS = 10  # 保留最近 10 轮（每轮 = user + assistant）
 # 结构化批量：每批 N 条，输入/输出均为 JSON 数组，便于长度对齐
 BATCH_SIZE = 100
 
+# 异步模式（--concurrency > 1）：429 / 5xx / 连接错误的重试次数与退避上下限（秒）
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+# 限流窗口（秒）
+RATE_WINDOW = 60.0
 
-def get_client() -> OpenAI:
+
+def _client_kwargs() -> dict:
     raw = os.environ.get("GLM_API_KEY") or os.environ.get("ZHIPU_API_KEY")
     # 防止 .env 里同一行写注释导致 key 带上中文，HTTP 头 ascii 编码报错
     api_key = (raw or "").split("#")[0].strip()
@@ -65,7 +87,16 @@ def get_client() -> OpenAI:
         print("请在 .env 中设置 GLM_API_KEY 或 ZHIPU_API_KEY（智谱 API Key）", file=sys.stderr)
         sys.exit(1)
     base_url = os.environ.get("GLM_BASE_URL", DEFAULT_BASE_URL)
-    return OpenAI(api_key=api_key, base_url=base_url)
+    return {"api_key": api_key, "base_url": base_url}
+
+
+def get_client() -> OpenAI:
+    return OpenAI(**_client_kwargs())
+
+
+def get_async_client() -> AsyncOpenAI:
+    # 重试由 create_with_retry 统一处理（带限流与抖动），关掉 SDK 自带的重试
+    return AsyncOpenAI(**_client_kwargs(), max_retries=0)
 
 
 def load_instruction() -> str:
@@ -187,36 +218,171 @@ def to_batch_input(entries_batch: list[dict]) -> list[dict]:
     return [{"offset": e["offset"], "text": e.get("original", "")} for e in entries_batch]
 
 
+def glossary_prompt(memori: MemoriStore, entries_batch: list[dict]) -> str:
+    """本批原文中出现的术语（Aho–Corasick 整句匹配），拼成附在请求末尾的术语表；没有命中时返回空串。"""
+    hits = memori.glossary_for_texts([e.get("original", "") for e in entries_batch])["hits"]
+    if not hits:
+        return ""
+    lines = [f"- {h['jp']} → {h['zh']}" + (f"（{h['note']}）" if h["note"] else "") for h in hits]
+    return "\n\n术语表（本批原文中出现，请沿用以下译法）：\n" + "\n".join(lines)
+
+
+def build_batch_messages(instruction: str, entries_batch: list[dict], memori: MemoriStore | None = None) -> list[dict]:
+    """批量翻译的请求消息：system 为 instruction，user 为本批 JSON 数组（及命中的术语表）。"""
+    inputs = to_batch_input(entries_batch)
+    user_content = "请将以下 JSON 数组中的日文翻译成中文（仅输出 JSON 数组，不要其他说明）：\n"
+    user_content += json.dumps(inputs, ensure_ascii=False, indent=2)
+    if memori is not None:
+        user_content += glossary_prompt(memori, entries_batch)
+    return [
+        {"role": "system", "content": instruction},
+        {"role": "user", "content": user_content},
+    ]
+
+
+def batch_request(model: str, messages: list[dict]) -> dict:
+    """chat.completions.create 的参数（同步、异步两种模式共用）。"""
+    return {
+        "model": model,
+        "messages": messages,
+        "temperature": 0.3,
+        "extra_body": {
+            "thinking": {
+                "type": "disabled"
+            }
+        },
+    }
+
+
+def response_content(resp) -> str:
+    choice = resp.choices[0] if resp.choices else None
+    return (choice.message.content or "").strip() if choice and getattr(choice, "message", None) else ""
+
+
 def translate_batch(
     client: OpenAI,
     model: str,
     instruction: str,
     entries_batch: list[dict],
+    memori: MemoriStore | None = None,
+    cache: ResponseCache | None = None,
 ) -> list[dict]:
     """批量翻译：输入为 JSON 数组（多条），输出为 JSON 数组，顺序与 offset 严格对应。
     返回与 entries_batch 等长的列表，每项为 {"offset", "text", "skiped"}。
+    给出 memori 时，把本批原文中出现的术语附在请求里；给出 cache 时，相同请求直接用缓存的回复。
     """
     if not entries_batch:
         return []
-    inputs = to_batch_input(entries_batch)
-    user_content = "请将以下 JSON 数组中的日文翻译成中文（仅输出 JSON 数组，不要其他说明）：\n"
-    user_content += json.dumps(inputs, ensure_ascii=False, indent=2)
-    new_messages = [
-        {"role": "system", "content": instruction},
-        {"role": "user", "content": user_content},
-    ]
-    resp = client.chat.completions.create(
-        model=model,
-        messages=new_messages,
-        temperature=0.3,
-        extra_body={
-            "thinking":{
-                "type":"disabled"
-            }
-        }
-    )
-    choice = resp.choices[0] if resp.choices else None
-    content = (choice.message.content or "").strip() if choice and getattr(choice, "message", None) else ""
+    request = batch_request(model, build_batch_messages(instruction, entries_batch, memori))
+    content = cache.get(request) if cache is not None else None
+    if content is None:
+        content = response_content(client.chat.completions.create(**request))
+        if cache is not None and extract_json_array(content):
+            cache.put(request, content)
+    return parse_batch_response(content, entries_batch)
+
+
+class RateLimiter:
+    """
+    异步模式的滑动窗口限流：最近 RATE_WINDOW 秒内的请求数不超过 rpm、token 数不超过 tpm（0 表示不限）。
+    发请求前按估算 token 占额，拿到响应后用实际 usage 修正。单个请求超过 tpm 时等窗口清空后放行。
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events: deque[list] = deque()  # [发出时间, token 数]
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int) -> list:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._events and now - self._events[0][0] >= RATE_WINDOW:
+                    self._events.popleft()
+                used = sum(event[1] for event in self._events)
+                if (not self.rpm or len(self._events) < self.rpm) and (
+                    not self.tpm or not self._events or used + tokens <= self.tpm
+                ):
+                    event = [now, tokens]
+                    self._events.append(event)
+                    return event
+                await asyncio.sleep(self._events[0][0] + RATE_WINDOW - now)
+
+    @staticmethod
+    def settle(event: list, tokens: int) -> None:
+        event[1] = tokens
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """粗估一次请求的 token 数：日文/中文约一字一 token，输出与输入中的待译部分相当，按输入的 2 倍计。"""
+    return 2 * sum(len(m.get("content") or "") for m in messages)
+
+
+def _retry_delay(exc: Exception, attempt: int) -> float:
+    """优先遵循 Retry-After 头，否则指数退避并加随机抖动，避免并发请求同时重试。"""
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after is not None:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+    except ValueError:
+        pass
+    cap = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt)
+    return random.uniform(cap / 2, cap)
+
+
+async def create_with_retry(
+    client: AsyncOpenAI,
+    request: dict,
+    limiter: RateLimiter,
+    max_retries: int = MAX_RETRIES,
+):
+    """限流后发出请求；429、5xx 与连接错误按抖动退避重试，其他错误直接抛出。"""
+    tokens = estimate_tokens(request["messages"])
+    for attempt in range(max_retries + 1):
+        event = await limiter.acquire(tokens)
+        try:
+            resp = await client.chat.completions.create(**request)
+        except (APIStatusError, APIConnectionError) as exc:
+            status = getattr(exc, "status_code", None)
+            retryable = status is None or status == 429 or status >= 500
+            if not retryable or attempt >= max_retries:
+                raise
+            delay = _retry_delay(exc, attempt)
+            print(f"    请求失败（{status or type(exc).__name__}），{delay:.1f}s 后重试（{attempt + 1}/{max_retries}）", file=sys.stderr)
+            await asyncio.sleep(delay)
+            continue
+        usage = getattr(resp, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None):
+            limiter.settle(event, usage.total_tokens)
+        return resp
+
+
+async def translate_batch_async(
+    client: AsyncOpenAI,
+    model: str,
+    instruction: str,
+    entries_batch: list[dict],
+    limiter: RateLimiter,
+    memori: MemoriStore | None = None,
+    max_retries: int = MAX_RETRIES,
+    cache: ResponseCache | None = None,
+) -> list[dict]:
+    """translate_batch 的异步版本，经 limiter 限流并自动重试；缓存命中时不发请求。"""
+    if not entries_batch:
+        return []
+    request = batch_request(model, build_batch_messages(instruction, entries_batch, memori))
+    content = cache.get(request) if cache is not None else None
+    if content is None:
+        content = response_content(await create_with_retry(client, request, limiter, max_retries))
+        if cache is not None and extract_json_array(content):
+            cache.put(request, content)
+    return parse_batch_response(content, entries_batch)
+
+
+def parse_batch_response(content: str, entries_batch: list[dict]) -> list[dict]:
+    """按 offset 取出模型回复中的译文，返回与 entries_batch 等长的 [{"offset", "text", "skiped"}]。"""
     out_list = extract_json_array(content) if content else []
     by_offset = {str(x.get("offset", "")): x for x in out_list if isinstance(x, dict)}
     results = []
@@ -238,21 +404,20 @@ def translate_batch(
 
 
 def load_translations_file() -> list[dict]:
-    """从唯一输出文件读取已翻译数组，不存在或异常时返回空列表。"""
-    if not TRANSLATIONS_OUTPUT_PATH.exists():
-        return []
-    try:
-        data = json.loads(TRANSLATIONS_OUTPUT_PATH.read_text(encoding="utf-8"))
-        return data if isinstance(data, list) else []
-    except (json.JSONDecodeError, IOError):
-        return []
+    """从唯一输出文件读取已翻译数组（快照 + 未合并的追加日志），不存在或异常时返回空列表。"""
+    return TranslationJournal(TRANSLATIONS_OUTPUT_PATH).load()
+
+
+def append_translations(entries: list[dict]) -> None:
+    """把一批条目的 offset/translation/skiped 追加到日志（不重写 translations.json）。"""
+    TranslationJournal(TRANSLATIONS_OUTPUT_PATH).append(entries)
 
 
 def save_translations_file(entries: list[dict], *, skip_filled: bool = True) -> None:
-    """将当前条目的 translation/skiped/hex 等合并到唯一输出文件并写回（JSON 数组）。
+    """将当前条目的 translation/skiped/hex 等合并到唯一输出文件并写回（JSON 数组），同时清空追加日志。
     当 skip_filled 为 True（未传 --no-skip）时，已存在的行（含 skiped）也会用当前条目的 original/hex 更新。"""
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    existing = load_translations_file()
+    journal = TranslationJournal(TRANSLATIONS_OUTPUT_PATH)
+    existing = journal.load()
     by_offset = {str(e.get("offset", "")): e for e in existing if isinstance(e, dict)}
     for e in entries:
         if not isinstance(e, dict):
@@ -285,10 +450,7 @@ def save_translations_file(entries: list[dict], *, skip_filled: bool = True) ->
                     row["hex"] = e.get("hex", "")
                 if "length" in e:
                     row["length"] = e.get("length")
-    out_list = list(by_offset.values())
-    TRANSLATIONS_OUTPUT_PATH.write_text(
-        json.dumps(out_list, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    journal.compact(list(by_offset.values()))
 
 
 def load_all_entries(chunk_files: list[Path]) -> list[dict]:
@@ -319,8 +481,210 @@ def process_all(
     dry_run: bool = False,
     skiped_only: bool = False,
     same_only: bool = False,
+    memori: MemoriStore | None = None,
+    cache: ResponseCache | None = None,
+    dedup: bool = True,
 ) -> None:
-    """对所有条目按批翻译（结构化 JSON），结果写入 translate/translations.json。"""
+    """对所有条目按批翻译（结构化 JSON），结果写入 translate/translations.json。
+    dedup 为 True 时相同原文只请求一次，译文按各条原文长度分别对齐后写回。"""
+    to_translate = select_to_translate(all_entries, skip_filled=skip_filled, skiped_only=skiped_only, same_only=same_only)
+    if not to_translate:
+        print(f"  无需翻译（共 {len(all_entries)} 条）")
+        return
+
+    print(f"  待翻译 {len(to_translate)} / {len(all_entries)} 条（结构化 JSON，每批 {batch_size} 条）")
+    chunks = plan_batches(to_translate, batch_size, dedup)
+    if dry_run:
+        return
+
+    offset_to_entry = {e["offset"]: e for e in all_entries}
+    num_batches = len(chunks)
+    done = 0
+    # 先合并一次，使每个 offset 在快照里都有完整的行；之后每批只追加日志，结束（含出错）时再合并
+    save_translations_file(all_entries, skip_filled=skip_filled)
+    try:
+        for b, chunk in enumerate(chunks):
+            try:
+                results = translate_batch(client, model, instruction, [r for r, _ in chunk], memori, cache)
+            except Exception as exc:
+                print(f"  第 {b + 1}/{num_batches} 批失败: {exc}", file=sys.stderr)
+                raise
+            append_translations(apply_batch_results(offset_to_entry, fan_out(results, chunk)))
+            done += batch_entry_count(chunk)
+            print(f"    已翻译第 {b + 1}/{num_batches} 批（{batch_progress(chunk, done, len(to_translate))}）")
+    finally:
+        save_translations_file(all_entries, skip_filled=skip_filled)
+    print(f"  已写入 {TRANSLATIONS_OUTPUT_PATH}")
+
+
+async def process_all_async(
+    client: AsyncOpenAI,
+    model: str,
+    instruction: str,
+    all_entries: list[dict],
+    *,
+    batch_size: int = BATCH_SIZE,
+    skip_filled: bool = True,
+    dry_run: bool = False,
+    skiped_only: bool = False,
+    same_only: bool = False,
+    memori: MemoriStore | None = None,
+    concurrency: int = 4,
+    rpm: int = 0,
+    tpm: int = 0,
+    max_retries: int = MAX_RETRIES,
+    cache: ResponseCache | None = None,
+    dedup: bool = True,
+) -> None:
+    """
+    process_all 的并发版本：最多 concurrency 批同时请求，按 rpm/tpm 限流。
+    各批完成顺序不定，但结果严格按批次顺序追加到日志，与逐批模式一致；
+    某批重试耗尽而失败时，取消其余请求，已按顺序写回的批次保留。
+    """
+    to_translate = select_to_translate(all_entries, skip_filled=skip_filled, skiped_only=skiped_only, same_only=same_only)
+    if not to_translate:
+        print(f"  无需翻译（共 {len(all_entries)} 条）")
+        return
+
+    print(
+        f"  待翻译 {len(to_translate)} / {len(all_entries)} 条（结构化 JSON，每批 {batch_size} 条，并发 {concurrency}）"
+    )
+    chunks = plan_batches(to_translate, batch_size, dedup)
+    if dry_run:
+        return
+
+    offset_to_entry = {e["offset"]: e for e in all_entries}
+    num_batches = len(chunks)
+    limiter = RateLimiter(rpm, tpm)
+    semaphore = asyncio.Semaphore(concurrency)
+    finished: dict[int, list[dict]] = {}
+    next_to_write = 0
+    done = 0
+
+    def write_ready() -> None:
+        nonlocal next_to_write, done
+        while next_to_write in finished:
+            b = next_to_write
+            append_translations(apply_batch_results(offset_to_entry, fan_out(finished.pop(b), chunks[b])))
+            done += batch_entry_count(chunks[b])
+            print(f"    已翻译第 {b + 1}/{num_batches} 批（{batch_progress(chunks[b], done, len(to_translate))}）")
+            next_to_write += 1
+
+    async def run(b: int) -> None:
+        async with semaphore:
+            try:
+                results = await translate_batch_async(
+                    client, model, instruction, [r for r, _ in chunks[b]], limiter, memori, max_retries, cache
+                )
+            except Exception as exc:
+                print(f"  第 {b + 1}/{num_batches} 批失败: {exc}", file=sys.stderr)
+                raise
+        finished[b] = results
+        write_ready()
+
+    save_translations_file(all_entries, skip_filled=skip_filled)
+    tasks = [asyncio.create_task(run(b)) for b in range(num_batches)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await client.close()
+        save_translations_file(all_entries, skip_filled=skip_filled)
+    print(f"  已写入 {TRANSLATIONS_OUTPUT_PATH}")
+
+
+def normalize_source(text: str) -> str:
+    """去重用的原文规范形式：去掉尾部的全角空格填充；整行都是全角空格时保持原样。"""
+    text = text or ""
+    return text.rstrip("　") or text
+
+
+def group_by_source(entries: list[dict]) -> list[tuple[dict, list[dict]]]:
+    """
+    按规范化后的原文分组，返回 [(代表条目, 同组条目), ...]，按首次出现的顺序排列。
+    只有一条时代表条目就是它本身；多条时代表条目取第一条的 offset、填充最少的原文，
+    这样模型按最短长度翻译，fan_out 再按各条原文长度分别补齐。
+    """
+    groups: dict[str, list[dict]] = {}
+    for e in entries:
+        groups.setdefault(normalize_source(e.get("original", "")), []).append(e)
+    plan = []
+    for members in groups.values():
+        if len(members) == 1:
+            plan.append((members[0], members))
+        else:
+            shortest = min((e.get("original", "") for e in members), key=len)
+            plan.append(({"offset": members[0]["offset"], "original": shortest}, members))
+    return plan
+
+
+def _payload_tokens(entry: dict) -> int:
+    """单条在批量请求中约占的 token（估算方式同 estimate_tokens）。"""
+    return 2 * len(json.dumps(to_batch_input([entry])[0], ensure_ascii=False))
+
+
+def plan_batches(to_translate: list[dict], batch_size: int, dedup: bool = True) -> list[list[tuple[dict, list[dict]]]]:
+    """把待翻译条目（去重后）切成每批 batch_size 个 (代表条目, 同组条目)，并打印去重节省的条数与 token。"""
+    if dedup:
+        groups = group_by_source(to_translate)
+        saved = len(to_translate) - len(groups)
+        if saved:
+            tokens = sum(_payload_tokens(e) for _, members in groups for e in members[1:])
+            print(f"  去重：{len(to_translate)} 条原文合并为 {len(groups)} 条请求，节省 {saved} 条、约 {tokens} token")
+    else:
+        groups = [(e, [e]) for e in to_translate]
+    return [groups[start : start + batch_size] for start in range(0, len(groups), batch_size)]
+
+
+def batch_entry_count(chunk: list[tuple[dict, list[dict]]]) -> int:
+    """一批写回的条目数（各组成员数之和）；不去重时等于请求条数。"""
+    return sum(len(members) for _, members in chunk)
+
+
+def batch_progress(chunk: list[tuple[dict, list[dict]]], done: int, total: int) -> str:
+    """每批进度说明：本批请求条数、写回条数，以及累计写回条数 / 待翻译总条数。"""
+    entries = batch_entry_count(chunk)
+    if entries == len(chunk):
+        return f"本批 {entries} 条，累计 {done} / {total} 条"
+    return f"本批 {len(chunk)} 条请求、写回 {entries} 条，累计 {done} / {total} 条"
+
+
+def fan_out(results: list[dict], chunk: list[tuple[dict, list[dict]]]) -> list[dict]:
+    """把代表条目的结果分发到同组每个 offset：译文按各条原文重新 align_length，跳过的条写回各自原文。"""
+    out = []
+    for r, (rep, members) in zip(results, chunk):
+        for e in members:
+            if e is rep:
+                out.append(r)
+            elif r.get("skiped"):
+                out.append({"offset": e["offset"], "text": e.get("original", ""), "skiped": True})
+            else:
+                out.append({"offset": e["offset"], "text": align_length(r["text"], e.get("original", "")), "skiped": False})
+    return out
+
+
+def apply_batch_results(offset_to_entry: dict, results: list[dict]) -> list[dict]:
+    """把结果写进对应条目，返回被更新的条目。"""
+    updated = []
+    for r in results:
+        ent = offset_to_entry.get(r["offset"])
+        if ent is not None:
+            ent["translation"] = r["text"]
+            ent["skiped"] = r.get("skiped", False)
+            updated.append(ent)
+    return updated
+
+
+def select_to_translate(
+    all_entries: list[dict],
+    *,
+    skip_filled: bool = True,
+    skiped_only: bool = False,
+    same_only: bool = False,
+) -> list[dict]:
+    """把已有结果合并进 all_entries，并按模式挑出本次需要翻译的条目。"""
     # 始终加载已有结果，合并 translation/skiped；--no-skip 时已 skiped 的条也不重发
     out_data = load_translations_file()
     by_offset = {
@@ -352,33 +716,7 @@ def process_all(
             and not e.get("skiped")
             and (not skip_filled or not (e.get("translation") or "").strip())
         ]
-
-    if not to_translate:
-        print(f"  无需翻译（共 {len(all_entries)} 条）")
-        return
-
-    print(f"  待翻译 {len(to_translate)} / {len(all_entries)} 条（结构化 JSON，每批 {batch_size} 条）")
-    if dry_run:
-        return
-
-    offset_to_entry = {e["offset"]: e for e in all_entries}
-    num_batches = (len(to_translate) + batch_size - 1) // batch_size
-    for b in range(num_batches):
-        start = b * batch_size
-        chunk = to_translate[start : start + batch_size]
-        try:
-            results = translate_batch(client, model, instruction, chunk)
-        except Exception as exc:
-            print(f"  第 {b + 1}/{num_batches} 批失败: {exc}", file=sys.stderr)
-            raise
-        for r in results:
-            ent = offset_to_entry.get(r["offset"])
-            if ent is not None:
-                ent["translation"] = r["text"]
-                ent["skiped"] = r.get("skiped", False)
-        save_translations_file(all_entries, skip_filled=skip_filled)
-        print(f"    已翻译第 {b + 1}/{num_batches} 批（本批 {len(chunk)} 条）")
-    print(f"  已写入 {TRANSLATIONS_OUTPUT_PATH}")
+    return to_translate
 
 
 def main():
@@ -395,10 +733,32 @@ def main():
     parser.add_argument("--same-only", action="store_true", help="仅对 skip=false 且原文与译文相同的条目重新翻译")
     parser.add_argument("--dry-run", action="store_true", help="只列出待翻译文件与条数，不请求 API")
     parser.add_argument("--files", nargs="*", help="仅处理这些 chunk 文件（例如 text_chunk_001.json）")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="同时进行的请求数；大于 1 时使用异步客户端，失败按 429/5xx 退避重试（默认 1，逐批顺序请求）",
+    )
+    parser.add_argument("--rpm", type=int, default=0, help="并发模式下每分钟最多请求数（默认 0 不限）")
+    parser.add_argument("--tpm", type=int, default=0, help="并发模式下每分钟最多 token 数（按估算/实际用量，默认 0 不限）")
+    parser.add_argument(
+        "--max-retries", type=int, default=MAX_RETRIES, help=f"并发模式下单批最多重试次数（默认 {MAX_RETRIES}）"
+    )
+    parser.add_argument("--no-dedup", action="store_true", help="相同原文（忽略尾部全角空格）不合并，逐条发送")
+    parser.add_argument("--no-cache", action="store_true", help=f"不读写响应缓存（{RESPONSE_CACHE_PATH}），全部重新请求")
+    parser.add_argument(
+        "--memori",
+        nargs="?",
+        const=str(MEMORI_PATH),
+        default=None,
+        help=f"术语库（.json 或 .sqlite），把每批原文中出现的术语附在请求里；只写 --memori 时用 {MEMORI_PATH}（默认不附术语）",
+    )
     args = parser.parse_args()
+    if args.memori is not None and not Path(args.memori).exists():
+        parser.error(f"术语库不存在: {args.memori}")
 
     instruction = load_instruction()
-    client = get_client()
+    client = get_client() if args.concurrency <= 1 else None
     files = list_chunk_files()
     if args.files:
         by_name = {p.name: p for p in files}
@@ -414,17 +774,43 @@ def main():
 
     print(f"输出文件: {TRANSLATIONS_OUTPUT_PATH}")
     print(f"已合并 chunk 数: {len(files)}，总条数: {len(all_entries)}")
-    process_all(
-        client,
-        args.model,
-        instruction,
-        all_entries,
+    memori = MemoriStore(args.memori) if args.memori is not None else None
+    if memori is not None:
+        print(f"术语注入已开启: {args.memori}（每批请求附上原文命中的术语）")
+    cache = None if args.no_cache or args.dry_run else ResponseCache(RESPONSE_CACHE_PATH)
+    options = dict(
         batch_size=args.batch_size,
         skip_filled=not args.no_skip,
         dry_run=args.dry_run,
         skiped_only=args.skiped_only,
         same_only=args.same_only,
+        memori=memori,
+        cache=cache,
+        dedup=not args.no_dedup,
     )
+    try:
+        if client is not None:
+            process_all(client, args.model, instruction, all_entries, **options)
+        else:
+            asyncio.run(
+                process_all_async(
+                    get_async_client(),
+                    args.model,
+                    instruction,
+                    all_entries,
+                    concurrency=args.concurrency,
+                    rpm=args.rpm,
+                    tpm=args.tpm,
+                    max_retries=args.max_retries,
+                    **options,
+                )
+            )
+    finally:
+        if memori is not None:
+            memori.close()
+        if cache is not None:
+            print(f"  {cache.stats_line()}")
+            cache.close()
 
 
 if __name__ == "__main__":
@@ -9,6 +9,7 @@
   python translate_with_glm_plain_text.py --batch-size 200
   python translate_with_glm_plain_text.py --dry-run
   python translate_with_glm_plain_text.py --no-skip --files text_chunk_001.json
+  python translate_with_glm_plain_text.py --no-cache    # 不读写响应缓存
 """
 
 import os
@@ -26,11 +27,15 @@ from translate_with_glm import (
     load_all_entries,
     load_translations_file,
     save_translations_file,
+    append_translations,
     align_length,
+    response_content,
     TRANSLATIONS_OUTPUT_PATH,
     TEXT_DUMP_DIR,
     DEFAULT_MODEL,
+    RESPONSE_CACHE_PATH,
 )
+from response_cache import ResponseCache
 
 # 纯文本批量专用 instruction
 INSTRUCTION_PLAIN_PATH = SCRIPT_DIR / "translate_plain.instruction.md"
@@ -48,9 +53,12 @@ def _normalize_line(text: str) -> str:
     return s if s else PLACEHOLDER_EMPTY
 
 
-def translate_batch(client, model: str, instruction: str, entries_batch: list[dict]) -> list[str]:
+def translate_batch(
+    client, model: str, instruction: str, entries_batch: list[dict], cache: ResponseCache | None = None
+) -> list[str]:
     """批量翻译：输入多行纯文本（每行一条），输出多行纯文本，按 \\n 分割严格一一对应。
     返回与 entries_batch 等长的译文列表；若模型返回行数不一致则用原文补齐或截断。
+    给出 cache 时，相同请求直接用缓存的回复。
     """
     if not entries_batch:
         return []
@@ -62,17 +70,22 @@ def translate_batch(client, model: str, instruction: str, entries_batch: list[di
         "请只输出相同行数的结果，严格按行顺序一一对应，每行一条，不要编号、不要空行、不要合并。"
         "若某条属于职员表/报幕等不翻译内容，请在该行只输出 SKIPED（全大写）。不要输出任何解释。"
     )
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
+    request = {
+        "model": model,
+        "messages": [
             {"role": "system", "content": system},
             {"role": "user", "content": input_text},
         ],
-        temperature=0.3,
-    )
-    content = (resp.choices[0].message.content or "").strip()
-    out_lines = [ln.strip() for ln in content.split("\n")]
+        "temperature": 0.3,
+    }
     n = len(entries_batch)
+    content = cache.get(request) if cache is not None else None
+    if content is None:
+        content = response_content(client.chat.completions.create(**request))
+        # 只缓存行数正确的回复，截断或错行的回复下次重跑时重新请求
+        if cache is not None and len(content.split("\n")) == n:
+            cache.put(request, content)
+    out_lines = [ln.strip() for ln in content.split("\n")]
     if len(out_lines) < n:
         for i in range(len(out_lines), n):
             out_lines.append(_normalize_line(entries_batch[i].get("original", "")))
@@ -90,6 +103,7 @@ def process_all_plain_text(
     batch_size: int = BATCH_SIZE,
     skip_filled: bool = True,
     dry_run: bool = False,
+    cache: ResponseCache | None = None,
 ) -> None:
     """按批调用纯文本翻译，结果写回 translate/translations.json。"""
     # 始终加载已有结果，用于合并 translation/skiped；--no-skip 时也需据此排除已 skip 的条
@@ -122,29 +136,34 @@ def process_all_plain_text(
 
     offset_to_entry = {e["offset"]: e for e in all_entries}
     num_batches = (len(to_translate) + batch_size - 1) // batch_size
-    for b in range(num_batches):
-        start = b * batch_size
-        chunk = to_translate[start : start + batch_size]
-        try:
-            out_lines = translate_batch(client, model, instruction, chunk)
-        except Exception as exc:
-            print(f"  第 {b + 1}/{num_batches} 批失败: {exc}", file=sys.stderr)
-            raise
-        for i, entry in enumerate(chunk):
-            trans_line = out_lines[i] if i < len(out_lines) else _normalize_line(entry.get("original", ""))
-            orig = (entry.get("original") or "")
-            is_skiped = trans_line.strip().upper() == SKIPED_MARKER or (
-                not orig.strip() and trans_line.strip() in ("", PLACEHOLDER_EMPTY)
-            )
-            ent = offset_to_entry.get(entry["offset"])
-            if ent is not None:
-                if is_skiped:
-                    ent["translation"] = orig
-                else:
-                    ent["translation"] = align_length(trans_line, ent["original"])
-                ent["skiped"] = is_skiped
+    # 先合并一次，之后每批只追加日志，结束（含出错）时再合并为 translations.json
+    save_translations_file(all_entries, skip_filled=skip_filled)
+    try:
+        for b in range(num_batches):
+            start = b * batch_size
+            chunk = to_translate[start : start + batch_size]
+            try:
+                out_lines = translate_batch(client, model, instruction, chunk, cache)
+            except Exception as exc:
+                print(f"  第 {b + 1}/{num_batches} 批失败: {exc}", file=sys.stderr)
+                raise
+            for i, entry in enumerate(chunk):
+                trans_line = out_lines[i] if i < len(out_lines) else _normalize_line(entry.get("original", ""))
+                orig = (entry.get("original") or "")
+                is_skiped = trans_line.strip().upper() == SKIPED_MARKER or (
+                    not orig.strip() and trans_line.strip() in ("", PLACEHOLDER_EMPTY)
+                )
+                ent = offset_to_entry.get(entry["offset"])
+                if ent is not None:
+                    if is_skiped:
+                        ent["translation"] = orig
+                    else:
+                        ent["translation"] = align_length(trans_line, ent["original"])
+                    ent["skiped"] = is_skiped
+            append_translations(chunk)
+            print(f"    已翻译第 {b + 1}/{num_batches} 批（本批 {len(chunk)} 条）")
+    finally:
         save_translations_file(all_entries, skip_filled=skip_filled)
-        print(f"    已翻译第 {b + 1}/{num_batches} 批（本批 {len(chunk)} 条）")
     print(f"  已写入 {TRANSLATIONS_OUTPUT_PATH}")
 
 
@@ -160,6 +179,7 @@ def main():
     parser.add_argument("--no-skip", action="store_true", help="不跳过已有译文，全部重翻")
     parser.add_argument("--dry-run", action="store_true", help="只列待翻译条数，不请求 API")
     parser.add_argument("--files", nargs="*", help="仅处理这些 chunk 文件")
+    parser.add_argument("--no-cache", action="store_true", help=f"不读写响应缓存（{RESPONSE_CACHE_PATH}），全部重新请求")
     args = parser.parse_args()
 
     if not INSTRUCTION_PLAIN_PATH.exists():
@@ -183,15 +203,22 @@ def main():
     print(f"Instruction: {INSTRUCTION_PLAIN_PATH}")
     print(f"输出文件: {TRANSLATIONS_OUTPUT_PATH}")
     print(f"已合并 chunk 数: {len(files)}，总条数: {len(all_entries)}")
-    process_all_plain_text(
-        client,
-        args.model,
-        instruction,
-        all_entries,
-        batch_size=args.batch_size,
-        skip_filled=not args.no_skip,
-        dry_run=args.dry_run,
-    )
+    cache = None if args.no_cache or args.dry_run else ResponseCache(RESPONSE_CACHE_PATH)
+    try:
+        process_all_plain_text(
+            client,
+            args.model,
+            instruction,
+            all_entries,
+            batch_size=args.batch_size,
+            skip_filled=not args.no_skip,
+            dry_run=args.dry_run,
+            cache=cache,
+        )
+    finally:
+        if cache is not None:
+            print(f"  {cache.stats_line()}")
+            cache.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+translations.json 的追加日志：翻译脚本每批只把 {offset, translation, skiped} 逐行追加到
+<translations.json>.log（JSON Lines），不再每批重写整个文件；运行结束（或下次开始）时再合并成快照。
+读取时先读快照，再按顺序重放日志，因此中途崩溃也不会丢已完成的批次，快照本身只会被原子替换。
+
+Example:
+    journal = TranslationJournal("translate/translations.json")
+    rows = journal.load()                      # 快照 + 日志
+    journal.append([{"offset": "0x6DA84", "translation": "继续", "skiped": False}])
+    journal.compact(rows)                      # 写出新快照并清空日志
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+
+
+def journal_path_for(snapshot: str | Path) -> Path:
+    """快照对应的日志路径：<snapshot>.log。"""
+    snapshot = Path(snapshot)
+    return snapshot.with_name(snapshot.name + ".log")
+
+
+class TranslationJournal:
+    """translations.json 快照 + 追加日志。"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.log_path = journal_path_for(self.path)
+
+    def load_snapshot(self) -> list[dict]:
+        """只读快照，不存在或损坏时返回空列表。"""
+        if not self.path.exists():
+            return []
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return data if isinstance(data, list) else []
+        except (json.JSONDecodeError, IOError):
+            return []
+
+    def load(self) -> list[dict]:
+        """读快照并重放日志。"""
+        return self.replay(self.load_snapshot())
+
+    def replay(self, rows: list[dict]) -> list[dict]:
+        """
+        在 rows（快照内容）上按顺序重放日志：按 offset 覆盖 translation/skiped。
+        日志只记这三个字段，补不出 original/hex/length，快照里没有的 offset 直接忽略
+        （翻译脚本开跑前已把所有条目合并进快照，正常不会出现）。
+        """
+        if not self.log_path.exists():
+            return rows
+        by_offset = {str(row.get("offset", "")): row for row in rows if isinstance(row, dict)}
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    update = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时最后一行可能只写了一半，忽略
+                    continue
+                key = str(update.get("offset", ""))
+                row = by_offset.get(key)
+                if row is None:
+                    continue
+                row["translation"] = update.get("translation", "")
+                row["skiped"] = update.get("skiped", False)
+        return rows
+
+    def append(self, entries: Iterable[dict]) -> int:
+        """把各条的 {offset, translation, skiped} 追加到日志并落盘，返回行数。"""
+        lines = [
+            json.dumps(
+                {"offset": e.get("offset"), "translation": e.get("translation", ""), "skiped": e.get("skiped", False)},
+                ensure_ascii=False,
+            )
+            + "\n"
+            for e in entries
+        ]
+        if not lines:
+            return 0
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(lines)
+
+    def compact(self, rows: list[dict]) -> None:
+        """把 rows 原子地写成新快照（先写临时文件并落盘再替换），然后删除日志。"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(str(self.path) + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(rows, ensure_ascii=False, indent=2))
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(self.path)
+        self.log_path.unlink(missing_ok=True)
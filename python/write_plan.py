@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+写入计划：把一批 (offset, 字节) 先按 offset 排序并检查重叠，再把相邻或间隔很小的区间合并成大块写入，
+代替逐条 seek + write。计划可以存成 JSON，其他工具（如 differ、校验脚本）无需重新编码即可复用。
+
+Example:
+    plan = WritePlan(iter_encoded_translations(data, encoder))
+    with RomImage("patched.gba", writable=True) as rom:
+        writes = plan.apply(rom)
+    plan.save("write_plan.json")
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable
+
+from rom_image import RomImage
+
+WRITE_PLAN_VERSION = 1
+# 两段之间不超过这么多字节时合并为一次写入（间隔部分沿用 ROM 原有字节）
+DEFAULT_MERGE_GAP = 16
+# 报错时最多列出的重叠条数
+_MAX_REPORTED_OVERLAPS = 20
+
+
+class WritePlan:
+    """按 offset 排好序、互不重叠的写入区间列表。重叠时构造即抛 ValueError。"""
+
+    def __init__(self, spans: Iterable[tuple[int, bytes]]):
+        self.spans: list[tuple[int, bytes]] = sorted(
+            ((int(offset), bytes(data)) for offset, data in spans if len(data)),
+            key=lambda span: span[0],
+        )
+        overlaps = self.overlaps()
+        if overlaps:
+            lines = [
+                f"  0x{a:X} (+{a_len}) 与 0x{b:X} (+{b_len})"
+                for (a, a_len), (b, b_len) in overlaps[:_MAX_REPORTED_OVERLAPS]
+            ]
+            more = len(overlaps) - len(lines)
+            if more > 0:
+                lines.append(f"  ……另有 {more} 处")
+            raise ValueError(f"写入区间重叠 {len(overlaps)} 处:\n" + "\n".join(lines))
+        self.shadowed: list[tuple[tuple[int, int], tuple[int, int]]] = []
+
+    @classmethod
+    def layered(cls, spans: Iterable[tuple[int, bytes]]) -> "WritePlan":
+        """
+        按给定顺序逐条叠加写入的结果构建计划：互相重叠的条目后者覆盖前者，合并为一段，不抛错。
+        被覆盖的区间对 [((前者 offset, len), (后者 offset, len)), ...] 记在返回计划的 shadowed 上。
+        """
+        items = [(int(offset), bytes(data)) for offset, data in spans if len(data)]
+        order = sorted(range(len(items)), key=lambda i: items[i][0])
+        shadowed = []
+        merged = []
+        k = 0
+        while k < len(order):
+            group = [order[k]]
+            lo, first = items[order[k]]
+            hi = lo + len(first)
+            k += 1
+            while k < len(order) and items[order[k]][0] < hi:
+                offset, data = items[order[k]]
+                group.append(order[k])
+                hi = max(hi, offset + len(data))
+                k += 1
+            if len(group) == 1:
+                merged.append((lo, first))
+                continue
+            buf = bytearray(hi - lo)
+            group.sort()
+            for j, i in enumerate(group):
+                offset, data = items[i]
+                buf[offset - lo : offset - lo + len(data)] = data
+                for earlier in group[:j]:
+                    e_off, e_data = items[earlier]
+                    if max(offset, e_off) < min(offset + len(data), e_off + len(e_data)):
+                        shadowed.append(((e_off, len(e_data)), (offset, len(data))))
+            merged.append((lo, bytes(buf)))
+        plan = cls(merged)
+        plan.shadowed = shadowed
+        return plan
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(len(data) for _, data in self.spans)
+
+    def overlaps(self) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+        """返回所有与前一段重叠的相邻区间对 [((offset, len), (offset, len)), ...]。"""
+        found = []
+        for (a, a_data), (b, b_data) in zip(self.spans, self.spans[1:]):
+            if b < a + len(a_data):
+                found.append(((a, len(a_data)), (b, len(b_data))))
+        return found
+
+    def apply(self, rom: RomImage, max_gap: int = DEFAULT_MERGE_GAP) -> int:
+        """
+        按组写入 ROM：单段组直接写；多段组把各段与段间的 ROM 现有字节拼成一块后一次写回。
+        越界时由 RomImage 抛 ValueError。返回实际写入次数。
+        """
+        spans = self.spans
+        writes = 0
+        i, n = 0, len(spans)
+        with rom.view() as view:
+            while i < n:
+                lo, data = spans[i]
+                hi = lo + len(data)
+                parts = [data]
+                i += 1
+                while i < n and spans[i][0] - hi <= max_gap:
+                    offset, data = spans[i]
+                    if offset > hi:
+                        parts.append(view[hi:offset])
+                    parts.append(data)
+                    hi = offset + len(data)
+                    i += 1
+                rom.write(lo, parts[0] if len(parts) == 1 else b"".join(parts))
+                writes += 1
+        return writes
+
+    def to_json(self) -> dict:
+        return {
+            "version": WRITE_PLAN_VERSION,
+            "spans": [[f"0x{offset:X}", data.hex().upper()] for offset, data in self.spans],
+        }
+
+    @classmethod
+    def from_json(cls, raw: dict) -> "WritePlan":
+        if raw.get("version") != WRITE_PLAN_VERSION:
+            raise ValueError(f"不支持的写入计划版本: {raw.get('version')}")
+        return cls((int(offset, 16), bytes.fromhex(payload)) for offset, payload in raw["spans"])
+
+    def save(self, path: str | Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "WritePlan":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_json(json.load(f))